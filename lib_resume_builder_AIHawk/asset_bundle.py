@@ -0,0 +1,169 @@
+import base64
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+import urllib.request
+from pathlib import Path
+from typing import Iterable, List, Optional
+from urllib.parse import urljoin
+from lib_resume_builder_AIHawk.config import global_config
+
+logger = logging.getLogger(__name__)
+
+_LINK_RE = re.compile(r'<link\b[^>]*\bhref="(https?://[^"]+)"[^>]*>', re.IGNORECASE)
+_IMPORT_RE = re.compile(r'@import\s+url\(\s*([\'"]?)(https?://[^\'")]+)\1\s*\)\s*;', re.IGNORECASE)
+_URL_RE = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+_SRC_RE = re.compile(r'\bsrc\s*:\s*([^;}]+)')
+# Le etichette sono nomi ("latin") o, per i font CJK divisi in molte fette, numeri tra parentesi ("[42]")
+_SUBSET_FACE_RE = re.compile(r'/\*\s*\[?([\w-]+)\]?\s*\*/\s*(@font-face\s*\{[^}]*\})')
+
+# Google Fonts restituisce woff2 solo se lo user agent è quello di un browser moderno
+_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+)
+
+
+class AssetBundle:
+
+    def __init__(self, directory: Path, font_subsets: Iterable[str] = ("latin", "latin-ext"),
+                 fetch_on_miss: bool = True):
+        self.directory = Path(directory)
+        self.font_subsets = set(font_subsets)
+        self.fetch_on_miss = fetch_on_miss
+        self._inlined = {}
+        self._lock = threading.Lock()
+
+    def _css_path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.css"
+
+    @staticmethod
+    def _fetch(url: str) -> bytes:
+        request = urllib.request.Request(url, headers={"User-Agent": _USER_AGENT})
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.read()
+
+    def _filter_subsets(self, css: str) -> str:
+        # Mantiene solo i blocchi @font-face dei sottoinsiemi unicode richiesti
+        def replace(match):
+            return match.group(0) if match.group(1) in self.font_subsets else ""
+        return _SUBSET_FACE_RE.sub(replace, css)
+
+    @staticmethod
+    def _prune_font_sources(css: str) -> str:
+        # Tutti i browser supportati leggono woff2: gli altri formati sono solo peso in più
+        def replace(match):
+            sources = [source.strip() for source in match.group(1).split(",")]
+            woff2 = [source for source in sources if "woff2" in source]
+            if woff2:
+                return "src:" + ",".join(woff2)
+            if all(".eot" in source for source in sources):
+                return ""
+            return match.group(0)
+        return _SRC_RE.sub(replace, css)
+
+    def _embed_urls(self, css: str, base_url: str) -> str:
+        def replace(match):
+            reference = match.group(2)
+            if reference.startswith("data:"):
+                return match.group(0)
+            absolute_url = urljoin(base_url, reference)
+            content = self._fetch(absolute_url)
+            mime_type = mimetypes.guess_type(absolute_url.split("?")[0])[0] or "application/octet-stream"
+            if absolute_url.split("?")[0].endswith(".woff2"):
+                mime_type = "font/woff2"
+            return f'url(data:{mime_type};base64,{base64.b64encode(content).decode("ascii")})'
+        return _URL_RE.sub(replace, css)
+
+    def _write_atomic(self, path: Path, content: str):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+                tmp_file.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def cache_stylesheet(self, url: str) -> str:
+        css = self._fetch(url).decode("utf-8")
+        css = self._filter_subsets(css)
+        css = self._prune_font_sources(css)
+        css = self._embed_urls(css, url)
+        self._write_atomic(self._css_path(url), css)
+        logger.info(f"Cached stylesheet {url}")
+        return css
+
+    def stylesheet(self, url: str) -> Optional[str]:
+        with self._lock:
+            if url in self._inlined:
+                return self._inlined[url]
+        path = self._css_path(url)
+        if path.is_file():
+            css = path.read_text(encoding="utf-8")
+        elif self.fetch_on_miss:
+            try:
+                css = self.cache_stylesheet(url)
+            except OSError as e:
+                logger.warning(f"Could not cache stylesheet {url}, keeping the remote reference: {e}")
+                return None
+        else:
+            return None
+        with self._lock:
+            self._inlined[url] = css
+        return css
+
+    def inline_assets(self, html: str) -> str:
+        def replace_link(match):
+            css = self.stylesheet(match.group(1))
+            return match.group(0) if css is None else f"<style>\n{css}\n</style>"
+
+        def replace_import(match):
+            css = self.stylesheet(match.group(2))
+            return match.group(0) if css is None else css
+
+        html = _LINK_RE.sub(replace_link, html)
+        return _IMPORT_RE.sub(replace_import, html)
+
+    @staticmethod
+    def remote_urls(styles_directory: Optional[Path] = None) -> List[str]:
+        urls = _LINK_RE.findall(global_config.html_template)
+        styles_directory = Path(styles_directory or global_config.STYLES_DIRECTORY or Path(__file__).resolve().parent / "resume_style")
+        for style_file in sorted(styles_directory.glob("*.css")):
+            urls.extend(match[1] for match in _IMPORT_RE.findall(style_file.read_text(encoding="utf-8")))
+        return list(dict.fromkeys(urls))
+
+    def prewarm(self, urls: Optional[Iterable[str]] = None) -> List[str]:
+        urls = list(urls) if urls is not None else self.remote_urls()
+        for url in urls:
+            if not self._css_path(url).is_file():
+                self.cache_stylesheet(url)
+        return urls
+
+
+_default_bundle = None
+_default_bundle_lock = threading.Lock()
+
+
+def get_asset_bundle() -> AssetBundle:
+    global _default_bundle
+    with _default_bundle_lock:
+        if _default_bundle is None:
+            _default_bundle = AssetBundle(
+                global_config.ASSETS_DIRECTORY or Path(global_config.CACHE_DIRECTORY) / "assets",
+                font_subsets=global_config.ASSETS_FONT_SUBSETS,
+                fetch_on_miss=global_config.ASSETS_FETCH_ON_MISS,
+            )
+        return _default_bundle
+
+
+if __name__ == "__main__":
+    # Da eseguire una volta per deployment: dopo, il rendering non fa richieste di rete
+    logging.basicConfig(level=logging.INFO)
+    for cached_url in get_asset_bundle().prewarm():
+        print(cached_url)
@@ -0,0 +1,238 @@
+import json
+import logging
+import shutil
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from langchain_core.messages import AIMessage
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.rate_limiter import estimate_tokens
+from lib_resume_builder_AIHawk.usage import section_scope
+
+logger = logging.getLogger(__name__)
+
+_ROLES = {"human": "user", "ai": "assistant", "system": "system"}
+_FINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchBackend(ABC):
+    # Un backend riceve un file JSONL nel formato della Batch API di OpenAI
+    # e restituisce le risposte per custom_id
+
+    @abstractmethod
+    def submit(self, requests_path: Path) -> str:
+        pass
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        pass
+
+    @abstractmethod
+    def results(self, batch_id: str) -> Dict[str, Dict]:
+        pass
+
+
+def _parse_output_lines(lines) -> Dict[str, Dict]:
+    results = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        response = entry.get("response") or {}
+        body = response.get("body") or {}
+        if entry.get("error") or response.get("status_code") != 200:
+            logger.error(f"Batch request {entry.get('custom_id')} failed: {entry.get('error') or body}")
+            continue
+        results[str(entry["custom_id"])] = {
+            "content": body["choices"][0]["message"]["content"],
+            "usage": body.get("usage", {}),
+            "model": body.get("model"),
+        }
+    return results
+
+
+class OpenAIBatchBackend(BatchBackend):
+
+    def __init__(self, api_key: str, completion_window: str = "24h"):
+        import openai
+        self.client = openai.OpenAI(api_key=api_key)
+        self.completion_window = completion_window
+
+    def submit(self, requests_path: Path) -> str:
+        with open(requests_path, "rb") as requests_file:
+            input_file = self.client.files.create(file=requests_file, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> Dict[str, Dict]:
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.error_file_id:
+            logger.error(f"Batch {batch_id} has failed requests, see file {batch.error_file_id}")
+        if not batch.output_file_id:
+            return {}
+        return _parse_output_lines(self.client.files.content(batch.output_file_id).text.splitlines())
+
+
+class LocalFileBatchBackend(BatchBackend):
+    # Sostituto senza rete: ogni richiesta viene risolta subito da responder e scritta
+    # in un file di output con lo stesso formato della Batch API
+
+    def __init__(self, directory: Path, responder: Callable[[Dict], str] = None):
+        self.directory = Path(directory)
+        self.responder = responder or self._placeholder
+
+    @staticmethod
+    def _placeholder(body: Dict) -> str:
+        return f"<section><!-- {body.get('model')} --></section>"
+
+    def submit(self, requests_path: Path) -> str:
+        batch_id = f"local-{uuid.uuid4().hex}"
+        batch_directory = self.directory / batch_id
+        batch_directory.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(requests_path, batch_directory / "input.jsonl")
+        with open(requests_path, "r", encoding="utf-8") as requests_file, \
+                open(batch_directory / "output.jsonl", "w", encoding="utf-8") as output_file:
+            for line in requests_file:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                content = self.responder(request["body"])
+                # Token stimati come nel rate limiter, così anche le esecuzioni locali finiscono nel tracker
+                prompt_tokens = estimate_tokens("\n".join(message["content"] for message in request["body"]["messages"]))
+                completion_tokens = estimate_tokens(content)
+                body = {
+                    "model": request["body"].get("model"),
+                    "choices": [{"message": {"role": "assistant", "content": content}}],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                }
+                output_file.write(json.dumps(
+                    {"custom_id": request["custom_id"], "response": {"status_code": 200, "body": body}, "error": None}
+                ) + "\n")
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        return "completed" if (self.directory / batch_id / "output.jsonl").exists() else "failed"
+
+    def results(self, batch_id: str) -> Dict[str, Dict]:
+        with open(self.directory / batch_id / "output.jsonl", "r", encoding="utf-8") as output_file:
+            return _parse_output_lines(output_file)
+
+
+def section_request(custom_id: str, llm, messages) -> Dict:
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": llm.model_name,
+            "temperature": llm.temperature,
+            "messages": [{"role": _ROLES.get(message.type, "user"), "content": message.content}
+                         for message in messages.to_messages()],
+        },
+    }
+
+
+def batch_reply(result: Dict) -> AIMessage:
+    # Risposta della Batch API nella forma di un AIMessage di ChatOpenAI
+    usage = result.get("usage") or {}
+    input_tokens = usage.get("prompt_tokens", 0)
+    output_tokens = usage.get("completion_tokens", 0)
+    return AIMessage(
+        content=result["content"],
+        response_metadata={"model_name": result.get("model") or ""},
+        usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": usage.get("total_tokens", input_tokens + output_tokens),
+        },
+    )
+
+
+def write_requests(requests: List[Dict], path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as requests_file:
+        for request in requests:
+            requests_file.write(json.dumps(request, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def wait_for_batch(backend: BatchBackend, batch_id: str, poll_interval: float, timeout: Optional[float] = None) -> str:
+    start = time.monotonic()
+    while True:
+        status = backend.status(batch_id)
+        if status in _FINAL_STATES:
+            return status
+        if timeout is not None and time.monotonic() - start > timeout:
+            raise TimeoutError(f"Batch {batch_id} still {status} after {timeout}s")
+        logger.info(f"Batch {batch_id} is {status}, checking again in {poll_interval}s")
+        time.sleep(poll_interval)
+
+
+def run_bulk(answerers: Dict[str, object], backend: BatchBackend = None, work_directory: Path = None,
+             poll_interval: float = None, timeout: Optional[float] = None) -> Dict[str, str]:
+    # answerers: id del resume -> LLMResumer con resume (ed eventuale job description) già impostati.
+    # Tutti i prompt delle sezioni finiscono in un unico file di richieste; le sezioni già
+    # presenti nel section store non vengono richieste di nuovo
+    backend = backend or OpenAIBatchBackend(global_config.API_KEY, global_config.BULK_COMPLETION_WINDOW)
+    work_directory = Path(work_directory or global_config.BULK_WORK_DIRECTORY or
+                          Path(global_config.CACHE_DIRECTORY) / "bulk")
+    poll_interval = poll_interval if poll_interval is not None else global_config.BULK_POLL_INTERVAL
+
+    results = {resume_id: {} for resume_id in answerers}
+    # custom_id -> (id del resume, sezione, chiave del section store, prompt): gli id dei resume
+    # possono essere di qualsiasi tipo, custom_id è sempre una stringa
+    pending = {}
+    requests = []
+    for resume_id, answerer in answerers.items():
+        answerer.section_report = {}
+        for section in answerer._sections_to_generate():
+            key, stored = answerer._stored_section(section)
+            if stored is not None:
+                results[resume_id][section] = stored
+                continue
+            custom_id = f"{resume_id}::{section}"
+            messages = answerer._section_prompt(section).invoke(answerer._prompt_inputs(section))
+            pending[custom_id] = (resume_id, section, key, messages)
+            # Con il budget già superato si interrompe o si richiede il modello di ripiego
+            requests.append(section_request(custom_id, answerer.llm_cheap._llm_for_budget(), messages))
+
+    if requests:
+        requests_path = work_directory / f"requests-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.jsonl"
+        write_requests(requests, requests_path)
+        batch_id = backend.submit(requests_path)
+        logger.info(f"Submitted {len(requests)} section requests as batch {batch_id}")
+        status = wait_for_batch(backend, batch_id, poll_interval, timeout)
+        if status != "completed":
+            logger.error(f"Batch {batch_id} ended as {status}")
+        for custom_id, result in backend.results(batch_id).items():
+            if custom_id not in pending:
+                logger.error(f"Batch {batch_id} returned an unknown request {custom_id}")
+                continue
+            resume_id, section, key, messages = pending[custom_id]
+            answerer = answerers[resume_id]
+            reply = batch_reply(result)
+            # Log delle chiamate e tracker di utilizzo come per le richieste in tempo reale
+            with section_scope(section):
+                answerer.llm_cheap.account_reply(messages, reply)
+            answerer._store_section(section, key, reply.content)
+            results[resume_id][section] = reply.content
+
+    bodies = {}
+    for resume_id, answerer in answerers.items():
+        for section in answerer._sections_to_generate():
+            if section not in results[resume_id]:
+                answerer.section_report[section] = "failed"
+        bodies[resume_id] = answerer._assemble_html(results[resume_id])
+    return bodies
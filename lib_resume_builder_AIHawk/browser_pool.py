@@ -0,0 +1,189 @@
+import atexit
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+from selenium.common.exceptions import WebDriverException
+from lib_resume_builder_AIHawk.config import global_config
+
+try:
+    import psutil
+except ImportError:  # psutil is optional, without it sessions are recycled only by render count
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserSession:
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.renders = 0
+        self.broken = False
+        self.base_handle = driver.current_window_handle
+
+    def open_page(self):
+        # Ogni checkout lavora su una scheda nuova, senza i cookie dei render precedenti
+        self.driver.switch_to.new_window('tab')
+        self.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        return self.driver.current_window_handle
+
+    def close_page(self):
+        for handle in self.driver.window_handles:
+            if handle != self.base_handle:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+        self.driver.switch_to.window(self.base_handle)
+
+    def is_healthy(self) -> bool:
+        if self.broken:
+            return False
+        try:
+            self.driver.switch_to.window(self.base_handle)
+            return self.driver.execute_script("return 1") == 1
+        except WebDriverException:
+            return False
+
+    def rss_mb(self) -> Optional[float]:
+        if psutil is None:
+            return None
+        try:
+            service_process = psutil.Process(self.driver.service.process.pid)
+            processes = [service_process] + service_process.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+        except (psutil.Error, AttributeError):
+            return None
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error while closing browser session: {e}")
+
+
+class BrowserPool:
+
+    def __init__(self, size: int = 2, max_renders: int = 50, max_rss_mb: Optional[float] = 1024,
+                 driver_factory: Callable = None):
+        if driver_factory is None:
+            from lib_resume_builder_AIHawk.utils import create_driver_selenium
+            driver_factory = create_driver_selenium
+        self.size = size
+        self.max_renders = max_renders
+        self.max_rss_mb = max_rss_mb
+        self.driver_factory = driver_factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._sessions = set()
+        self._closed = False
+
+    @contextmanager
+    def page(self, timeout: Optional[float] = None):
+        if self._closed:
+            raise RuntimeError("The browser pool has been shut down.")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No browser available in the pool after {timeout} seconds.")
+        session = None
+        try:
+            session = self._checkout()
+            session.open_page()
+            yield session.driver
+        except WebDriverException:
+            if session is not None:
+                session.broken = True
+            raise
+        finally:
+            if session is not None:
+                self._checkin(session)
+            self._slots.release()
+
+    def _checkout(self) -> BrowserSession:
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if session.is_healthy():
+                return session
+            logger.info("Discarding unhealthy browser session")
+            self._discard(session)
+        session = BrowserSession(self.driver_factory())
+        with self._lock:
+            self._sessions.add(session)
+        return session
+
+    def _checkin(self, session: BrowserSession):
+        session.renders += 1
+        if not session.broken:
+            try:
+                session.close_page()
+            except WebDriverException:
+                session.broken = True
+        if session.broken or self._closed or self._needs_recycle(session):
+            self._discard(session)
+        else:
+            self._idle.put(session)
+
+    def _needs_recycle(self, session: BrowserSession) -> bool:
+        if self.max_renders and session.renders >= self.max_renders:
+            logger.info(f"Recycling browser session after {session.renders} renders")
+            return True
+        if self.max_rss_mb:
+            rss = session.rss_mb()
+            if rss is not None and rss > self.max_rss_mb:
+                logger.info(f"Recycling browser session using {rss:.0f} MB of memory")
+                return True
+        return False
+
+    def _discard(self, session: BrowserSession):
+        with self._lock:
+            self._sessions.discard(session)
+        session.quit()
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            sessions = list(self._sessions)
+            self._sessions.clear()
+        for session in sessions:
+            session.quit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None or _default_pool._closed:
+            _default_pool = BrowserPool(
+                size=global_config.BROWSER_POOL_SIZE,
+                max_renders=global_config.BROWSER_POOL_MAX_RENDERS,
+                max_rss_mb=global_config.BROWSER_POOL_MAX_RSS_MB,
+            )
+        return _default_pool
+
+
+def shutdown_browser_pool():
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is not None:
+            _default_pool.close()
+            _default_pool = None
+
+
+atexit.register(shutdown_browser_pool)
@@ -9,6 +9,88 @@ class GlobalConfig:
         self.STYLES_DIRECTORY: Path = None
         self.LOG_OUTPUT_FILE_PATH: Path = None
         self.API_KEY: str = None
+        self.BROWSER_POOL_SIZE: int = 2
+        self.BROWSER_POOL_MAX_RENDERS: int = 50
+        self.BROWSER_POOL_MAX_RSS_MB: float = 1024
+        self.RENDER_READY_TIMEOUT: float = 10
+        self.RENDER_READY_SELECTOR: str = None
+        self.RENDER_NETWORK_IDLE_MS: int = 0
+        self.PDF_STREAM_CHUNK_SIZE: int = 512 * 1024
+        self.JOB_DESCRIPTION_READY_TIMEOUT: float = 15
+        self.JOB_DESCRIPTION_READY_SELECTOR: str = None
+        self.JOB_DESCRIPTION_NETWORK_IDLE_MS: int = 500
+        self.CACHE_DIRECTORY: Path = Path.home() / ".cache" / "lib_resume_builder_AIHawk"
+        self.ASSETS_DIRECTORY: Path = None  # Se None si usa CACHE_DIRECTORY / "assets"
+        # Sottoinsiemi unicode dei font da incorporare; le fette numerate dei font CJK ("[0]" ... "[119]")
+        # si indicano con il numero, es. "42". Le altre vengono scartate
+        self.ASSETS_FONT_SUBSETS: tuple = ("latin", "latin-ext")
+        self.ASSETS_FETCH_ON_MISS: bool = True
+        self.PDF_CACHE_ENABLED: bool = True
+        self.PDF_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+        self.LLM_CACHE_ENABLED: bool = True
+        self.LLM_CACHE_TTL: float = 7 * 24 * 3600  # Secondi, None per non far scadere le risposte
+        self.LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+        self.LLM_REQUESTS_PER_MINUTE: float = 500
+        self.LLM_TOKENS_PER_MINUTE: float = 200000
+        self.LLM_EXPECTED_OUTPUT_TOKENS: int = 800
+        # Retry con backoff esponenziale e jitter, entro un tempo totale massimo per chiamata
+        self.LLM_RETRY_MAX_ATTEMPTS: int = 6
+        self.LLM_RETRY_BASE_DELAY: float = 1.0
+        self.LLM_RETRY_MAX_DELAY: float = 30.0
+        self.LLM_RETRY_BUDGET: float = 120.0
+        # Dopo tanti errori consecutivi del servizio il circuito si apre e le richieste falliscono subito
+        self.LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+        self.LLM_CIRCUIT_RESET_TIMEOUT: float = 30.0
+        # Hedging (opzionale): duplicato della richiesta oltre il percentile storico della latenza
+        self.LLM_HEDGE_ENABLED: bool = False
+        self.LLM_HEDGE_PERCENTILE: float = 0.95
+        self.LLM_HEDGE_MIN_SAMPLES: int = 20
+        self.LLM_HEDGE_MAX_RATE: float = 0.1  # Quota massima di richieste duplicate
+        self.LLM_HEDGE_WINDOW: int = 200  # Latenze recenti conservate per sezione
+        self.LLM_LOG_MAX_BYTES: int = 50 * 1024 * 1024
+        self.LLM_LOG_ROTATE_INTERVAL: float = None  # Secondi, None per ruotare solo per dimensione
+        self.LLM_LOG_FLUSH_INTERVAL: float = 1.0
+        # Prezzi per token (input, output) in USD
+        self.LLM_PRICES: dict = {
+            "gpt-4o-mini": (0.00000015, 0.0000006),
+            "gpt-4o": (0.0000025, 0.00001),
+            "gpt-4-turbo": (0.00001, 0.00003),
+            "gpt-3.5-turbo": (0.0000005, 0.0000015),
+        }
+        # Modello di ripiego con on_exceeded="downgrade". Deve costare meno del modello in uso: se
+        # coincide (come con il default, gpt-4o-mini è già il più economico) il budget interrompe come "abort"
+        self.LLM_BUDGET_DOWNGRADE_MODEL: str = "gpt-4o-mini"
+        # Callable(model_name, temperature) -> chat model LangChain; se None si usa ChatOpenAI.
+        # Con i modelli di fake_llm i benchmark girano senza rete
+        self.LLM_FACTORY = None
+        # Pool di connessioni HTTP condiviso dai client OpenAI del processo
+        self.LLM_HTTP_MAX_CONNECTIONS: int = 20
+        self.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+        self.LLM_HTTP_KEEPALIVE_EXPIRY: float = 60.0
+        self.LLM_HTTP_TIMEOUT: float = 120.0
+        # "compact" scrive i dati del resume come righe "chiave: valore" e tabelle senza campi vuoti,
+        # "repr" usa il repr dei modelli pydantic
+        self.PROMPT_SERIALIZATION: str = "compact"
+        # HTML di ogni sezione conservato per hash degli input: si rigenerano solo le sezioni cambiate
+        self.SECTION_STORE_ENABLED: bool = True
+        self.SECTION_STORE_MAX_BYTES: int = 64 * 1024 * 1024
+        # Richieste LLM contemporanee al massimo durante la generazione per più job description
+        self.BATCH_MAX_CONCURRENCY: int = 8
+        # Sezioni in esecuzione contemporaneamente in tutto il processo, le altre attendono in coda
+        self.SECTION_EXECUTOR_MAX_IN_FLIGHT: int = 16
+        # Scadenze in secondi (None per nessun limite). Una sezione scaduta viene sostituita da una
+        # copia in cache o, con SECTION_FALLBACK "deterministic", dai dati del resume senza LLM;
+        # con "omit" viene tralasciata
+        self.SECTION_DEADLINE: float = 120.0
+        self.RESUME_DEADLINE: float = 300.0
+        self.SECTION_FALLBACK: str = "deterministic"
+        # Gruppi di sezioni generate con una sola richiesta, es. (("achievements", "certifications",
+        # "additional_skills"),). Vuoto: ogni sezione ha la sua richiesta. Lo streaming non li usa
+        self.SECTION_FUSION_GROUPS: tuple = ()
+        # Modalità bulk: file JSONL inviati a un backend batch e interrogati fino al completamento
+        self.BULK_WORK_DIRECTORY: Path = None  # Se None si usa CACHE_DIRECTORY / "bulk"
+        self.BULK_POLL_INTERVAL: float = 60.0
+        self.BULK_COMPLETION_WINDOW: str = "24h"
         self.html_template = """
                             <!DOCTYPE html>
                             <html lang="en">
@@ -17,9 +99,8 @@ class GlobalConfig:
                                 <meta name="viewport" content="width=device-width, initial-scale=1.0">
                                 <title>Resume</title>
                                 <link href="https://fonts.googleapis.com/css2?family=Barlow:wght@400;600&display=swap" rel="stylesheet" />
-                                <link href="https://fonts.googleapis.com/css2?family=Barlow:wght@400;600&display=swap" rel="stylesheet" /> 
                                 <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.3/css/all.min.css" /> 
-                                <link rel="stylesheet" href="$style_path">
+                                $style
                             </head>
                             $markdown
                             </body>
@@ -0,0 +1,44 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+_current_deadline = contextvars.ContextVar("llm_deadline", default=None)
+
+
+class DeadlineExceededError(TimeoutError):
+    pass
+
+
+def remaining_time() -> Optional[float]:
+    # Secondi alla scadenza più vicina fra quelle attive, None se non ce ne sono
+    deadline = _current_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline():
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceededError("Deadline exceeded")
+
+
+def ensure_time_for(seconds: float):
+    # Un'attesa che andrebbe oltre la scadenza viene interrotta subito invece di essere fatta
+    remaining = remaining_time()
+    if remaining is not None and seconds >= remaining:
+        raise DeadlineExceededError(f"Deadline exceeded: {remaining:.1f}s left, {seconds}s wait needed")
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    # Le scadenze annidate possono solo restringersi: vale la più vicina
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _current_deadline.get()
+    token = _current_deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from lib_resume_builder_AIHawk.config import global_config
+
+logger = logging.getLogger(__name__)
+
+# Superato max_bytes si elimina fino a questa frazione, così non ogni put successivo fa eviction
+LOW_WATER_RATIO = 0.9
+
+
+class DiskCache:
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Voci note al processo, dalla meno usata di recente: percorso -> dimensione. La directory
+        # viene letta una volta sola, al primo put
+        self._index = None
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, str):
+                part = part.encode("utf-8")
+            elif not isinstance(part, (bytes, bytearray)):
+                part = json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+            # La lunghezza evita collisioni tra concatenazioni diverse delle stesse parti
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def get_path(self, key: str) -> Optional[Path]:
+        # Il file può comunque sparire per un'eviction concorrente prima di essere aperto:
+        # chi lo apre tratta FileNotFoundError come un miss
+        path = self._path(key)
+        try:
+            # L'mtime fa da timestamp di ultimo accesso per l'eviction LRU
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            if self._index is not None and path in self._index:
+                self._index.move_to_end(path)
+        return path
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+            return None
+
+    def put_stream(self, key: str, writer: Callable) -> Path:
+        # writer riceve un file binario aperto; il rename finale rende la scrittura atomica
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                writer(tmp_file)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self.writes += 1
+            self._load_index()
+            self._size += size - self._index.pop(path, 0)
+            self._index[path] = size
+            if self._size > self.max_bytes:
+                self._evict(keep=path)
+        return path
+
+    def put_bytes(self, key: str, data: bytes) -> Path:
+        return self.put_stream(key, lambda cache_file: cache_file.write(data))
+
+    def _entries(self):
+        if not self.directory.is_dir():
+            return []
+        entries = []
+        for path in self.directory.glob("*/*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _load_index(self):
+        if self._index is None:
+            entries = sorted(self._entries(), key=lambda entry: entry[0])
+            self._index = OrderedDict((path, size) for _, size, path in entries)
+            self._size = sum(self._index.values())
+
+    def _evict(self, keep: Path):
+        # Dalle voci meno recenti fino al livello minimo; keep è la voce appena scritta
+        low_water = self.max_bytes * LOW_WATER_RATIO
+        for path in list(self._index):
+            if self._size <= low_water:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            self._size -= self._index.pop(path)
+            self.evictions += 1
+        logger.debug(f"Evicted entries from {self.directory}, size now {self._size} bytes")
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            self._index = OrderedDict()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+            }
+
+
+_pdf_cache = None
+_pdf_cache_lock = threading.Lock()
+
+
+def get_pdf_cache() -> Optional[DiskCache]:
+    global _pdf_cache
+    if not global_config.PDF_CACHE_ENABLED:
+        return None
+    with _pdf_cache_lock:
+        if _pdf_cache is None:
+            _pdf_cache = DiskCache(
+                Path(global_config.CACHE_DIRECTORY) / "pdf",
+                max_bytes=global_config.PDF_CACHE_MAX_BYTES,
+            )
+        return _pdf_cache
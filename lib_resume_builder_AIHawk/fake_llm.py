@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+from lib_resume_builder_AIHawk.rate_limiter import estimate_tokens
+from lib_resume_builder_AIHawk.section_fusion import requested_sections
+
+# Modelli senza rete per benchmark riproducibili: passano da LoggerChatModel come ChatOpenAI,
+# quindi cache, rate limiter, log e concorrenza restano quelli reali
+
+
+def _prompt_key(contents) -> Tuple[str, ...]:
+    return tuple(content.strip() for content in contents)
+
+
+def load_recorded_calls(path: Path) -> List[Dict]:
+    # Accetta sia il JSONL attuale sia il vecchio formato con oggetti JSON indentati uno dopo l'altro
+    text = Path(path).read_text(encoding="utf-8")
+    decoder = json.JSONDecoder()
+    entries = []
+    position = 0
+    while True:
+        while position < len(text) and text[position].isspace():
+            position += 1
+        if position >= len(text):
+            return entries
+        entry, position = decoder.raw_decode(text, position)
+        # Il file può iniziare con "[]", scritto da unit-test/pdf_generation.py
+        entries.extend(entry if isinstance(entry, list) else [entry])
+
+
+class _FakeChatModel(BaseChatModel):
+    model_name: str = "fake"
+    temperature: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _reply(self, messages: List[BaseMessage]) -> Tuple[str, float, int]:
+        # (contenuto, latenza in secondi, token di output)
+        raise NotImplementedError
+
+    def _messages(self, messages) -> List[BaseMessage]:
+        # Accetta anche PromptValue e stringhe, come invoke
+        if isinstance(messages, list):
+            return messages
+        return self._convert_input(messages).to_messages()
+
+    def _message(self, messages: List[BaseMessage], output_tokens: int, **fields) -> Dict[str, Any]:
+        messages = self._messages(messages)
+        input_tokens = estimate_tokens("\n".join(str(message.content) for message in messages))
+        return dict(
+            id=f"fake-{uuid.uuid4().hex}",
+            response_metadata={"model_name": self.model_name, "finish_reason": "stop"},
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+            **fields,
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        content, latency, output_tokens = self._reply(self._messages(messages))
+        time.sleep(latency)
+        message = AIMessage(**self._message(messages, output_tokens, content=content))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        content, latency, output_tokens = self._reply(self._messages(messages))
+        await asyncio.sleep(latency)
+        message = AIMessage(**self._message(messages, output_tokens, content=content))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        # La latenza è distribuita sui frammenti, l'ultimo porta metadati e usage come con stream_usage
+        content, latency, output_tokens = self._reply(self._messages(messages))
+        pieces = [content[index:index + 16] for index in range(0, len(content), 16)] or [""]
+        for piece in pieces:
+            time.sleep(latency / len(pieces))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        final = self._message(messages, output_tokens, content="")
+        final.pop("id")
+        yield ChatGenerationChunk(message=AIMessageChunk(**final))
+
+
+class ReplayChatModel(_FakeChatModel):
+    # Risponde con le risposte registrate in open_ai_calls.json per lo stesso prompt
+    log_path: Path
+    model_name: str = "replay"
+    latency: float = 0.0
+    on_miss: str = "error"  # "error" oppure "synthetic"
+    fallback: Optional[_FakeChatModel] = None
+
+    _replies: Dict[Tuple[str, ...], Tuple[str, int]] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: Any) -> None:
+        for entry in load_recorded_calls(self.log_path):
+            prompts = entry.get("prompts")
+            contents = [prompts] if isinstance(prompts, str) else list((prompts or {}).values())
+            self._replies[_prompt_key(contents)] = (entry.get("replies", ""), entry.get("output_tokens", 0))
+
+    def _reply(self, messages: List[BaseMessage]) -> Tuple[str, float, int]:
+        recorded = self._replies.get(_prompt_key(message.content for message in messages))
+        if recorded is not None:
+            content, output_tokens = recorded
+            return content, self.latency, output_tokens or estimate_tokens(content)
+        if self.on_miss == "synthetic":
+            return (self.fallback or SyntheticChatModel())._reply(messages)
+        raise KeyError("No recorded response for this prompt")
+
+
+class SyntheticChatModel(_FakeChatModel):
+    # HTML fittizio con latenza e numero di token estratti da distribuzioni normali; il seed
+    # combinato con l'hash del prompt rende ogni risposta identica tra un'esecuzione e l'altra
+    model_name: str = "synthetic"
+    latency_mean: float = 1.0
+    latency_stddev: float = 0.3
+    output_tokens_mean: int = 400
+    output_tokens_stddev: int = 100
+    seed: int = 0
+
+    # Parte della latenza pagata una volta per richiesta (connessione, coda, primo token): una
+    # richiesta con più sezioni la paga una volta sola, il resto si somma
+    request_overhead: float = 0.0
+
+    def _section_reply(self, prompt: str, css_class: str) -> Tuple[str, float, int]:
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode("utf-8")).digest()
+        rng = random.Random(int.from_bytes(digest[:8], "big"))
+        latency = max(0.0, rng.gauss(self.latency_mean, self.latency_stddev))
+        output_tokens = max(1, int(rng.gauss(self.output_tokens_mean, self.output_tokens_stddev)))
+        # Circa 4 caratteri per token, come la stima del rate limiter
+        filler = " ".join("lorem" for _ in range(max(1, output_tokens * 4 // 6)))
+        content = f'<section class="{css_class}">\n  <p>{filler}</p>\n</section>'
+        return content, latency, output_tokens
+
+    def _reply(self, messages: List[BaseMessage]) -> Tuple[str, float, int]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        sections = requested_sections(prompt)
+        if not sections:
+            return self._section_reply(prompt, "synthetic")
+        # Richiesta con più sezioni (section_fusion): un blocco delimitato per ciascuna
+        blocks, latency, output_tokens = [], self.request_overhead, 0
+        for section in sections:
+            content, section_latency, section_tokens = self._section_reply(f"{section}:{prompt}", "synthetic")
+            blocks.append(f"<<<SECTION {section}>>>\n{content}\n<<<END {section}>>>")
+            latency += max(0.0, section_latency - self.request_overhead)
+            output_tokens += section_tokens
+        return "\n".join(blocks), latency, output_tokens
@@ -1,27 +1,37 @@
-import json
+import asyncio
+import contextvars
+import itertools
 import os
-import tempfile
+import queue
+import random
 import textwrap
 import time
 from datetime import datetime
-from typing import Dict, List
-from langchain_community.document_loaders import TextLoader
+from typing import Dict, Iterator, List
 from langchain_core.messages.ai import AIMessage
-from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompt_values import StringPromptValue
-from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
 from langchain_openai import ChatOpenAI
-from langchain_text_splitters import TokenTextSplitter
-from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
 from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.deadlines import DeadlineExceededError, check_deadline, deadline_scope, ensure_time_for, remaining_time
+from lib_resume_builder_AIHawk.hedging import get_hedge_executor, get_hedge_policy
+from lib_resume_builder_AIHawk.log_writer import get_log_writer
+from lib_resume_builder_AIHawk.llm_cache import LLMResponseCache, get_llm_cache, render_messages
+from lib_resume_builder_AIHawk.llm_clients import get_logger_chat_model
+from lib_resume_builder_AIHawk.prompt_registry import get_prompt_registry, prompt_pack
+from lib_resume_builder_AIHawk.prompt_serializer import serialize_inputs
+from lib_resume_builder_AIHawk.section_fallback import deterministic_section_html
+from lib_resume_builder_AIHawk.section_executor import get_section_executor
+from lib_resume_builder_AIHawk.section_fusion import JOB_DESCRIPTION_REFERENCE, fused_prompt, split_fused_reply
+from lib_resume_builder_AIHawk.section_store import get_section_store
+from lib_resume_builder_AIHawk.usage import BudgetExceededError, current_section, current_tracker, model_prices, section_scope, token_cost
+from lib_resume_builder_AIHawk.retry_policy import CircuitBreaker, EmptyStreamError, backoff_delay, get_circuit_breaker, is_rate_limit, is_retryable, is_upstream_failure, retry_after
+from lib_resume_builder_AIHawk.rate_limiter import LLMRateLimiter, estimate_tokens, get_rate_limiter
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, wait
 import logging
 import re  # For regex parsing, especially in `parse_wait_time_from_error_message`
-from requests.exceptions import HTTPError as HTTPStatusError  # Handling HTTP status errors
-import openai
 
 load_dotenv()
 
@@ -49,7 +59,7 @@ class LLMLogger:
         self.llm = llm
 
     @staticmethod
-    def log_request(prompts, parsed_reply: Dict[str, Dict]):
+    def log_request(prompts, parsed_reply: Dict[str, Dict], cached: bool = False):
         calls_log = global_config.LOG_OUTPUT_FILE_PATH / "open_ai_calls.json"
         if isinstance(prompts, StringPromptValue):
             prompts = prompts.text
@@ -75,13 +85,9 @@ class LLMLogger:
 
         # Extract model details from the response
         model_name = parsed_reply["response_metadata"]["model_name"]
-        prompt_price_per_token = 0.00000015
-        completion_price_per_token = 0.0000006
 
-        # Calculate the total cost of the API call
-        total_cost = (input_tokens * prompt_price_per_token) + (
-            output_tokens * completion_price_per_token
-        )
+        # Calculate the total cost of the API call from the price table, cached replies cost nothing
+        total_cost = 0 if cached else token_cost(model_name, input_tokens, output_tokens)
 
         # Create a log entry with all relevant information
         log_entry = {
@@ -93,55 +99,376 @@ class LLMLogger:
             "input_tokens": input_tokens,
             "output_tokens": output_tokens,
             "total_cost": total_cost,
+            "cached": cached,
         }
 
-        # Write the log entry to the log file in JSON format
-        with open(calls_log, "a", encoding="utf-8") as f:
-            json_string = json.dumps(log_entry, ensure_ascii=False, indent=4)
-            f.write(json_string + "\n")
+        # Il writer in background scrive la voce come una riga JSONL compatta
+        get_log_writer(calls_log).write(log_entry)
 
 
 class LoggerChatModel:
 
-    def __init__(self, llm: ChatOpenAI):
+    def __init__(self, llm: ChatOpenAI, cache: LLMResponseCache = None, use_cache: bool = True,
+                 rate_limiter: LLMRateLimiter = None, circuit_breaker: CircuitBreaker = None):
         self.llm = llm
+        # Gli oggetti non passati esplicitamente si leggono da global_config a ogni chiamata: il
+        # wrapper è condiviso dal processo (llm_clients) e la configurazione può cambiare dopo
+        self.use_cache = use_cache
+        self._cache = cache
+        self._rate_limiter = rate_limiter
+        self._circuit_breaker = circuit_breaker
+
+        self._runnable = None
+        self._downgraded_llms = {}
+        self._same_model_downgrade_logged = False
+        # Chain compilate per questo modello, gestite da PromptRegistry
+        self.chain_cache = {}
+
+    @property
+    def cache(self):
+        # use_cache=False bypassa la cache anche quando è abilitata in global_config
+        if not self.use_cache:
+            return None
+        return self._cache or get_llm_cache()
+
+    @property
+    def rate_limiter(self) -> LLMRateLimiter:
+        # Il limiter è condiviso da tutte le istanze del processo
+        return self._rate_limiter or get_rate_limiter()
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        return self._circuit_breaker or get_circuit_breaker()
+
+    @property
+    def hedge_policy(self):
+        # None se l'hedging è disattivato (LLM_HEDGE_ENABLED)
+        return get_hedge_policy()
+
+    def as_runnable(self) -> RunnableLambda:
+        # Runnable con implementazione sync e async, così le chain supportano anche ainvoke
+        if self._runnable is None:
+            self._runnable = RunnableLambda(self.__call__, afunc=self.acall)
+        return self._runnable
+
+    def _cached_reply(self, llm, messages):
+        # La chiave dipende dal modello che risponde davvero, anche dopo un downgrade per budget
+        cache = self.cache
+        if cache is None:
+            return None, None
+        cache_key = cache.make_key(llm, messages)
+        cached_reply = cache.get(cache_key)
+        if cached_reply is not None:
+            parsed_reply = self.parse_llmresult(cached_reply)
+            LLMLogger.log_request(prompts=messages, parsed_reply=parsed_reply, cached=True)
+            self._record_usage(parsed_reply, cached=True)
+        return cache_key, cached_reply
+
+    def _record_usage(self, parsed_reply: Dict[str, Dict], cached: bool = False):
+        tracker = current_tracker()
+        if tracker is None:
+            return
+        model_name = parsed_reply["response_metadata"]["model_name"]
+        usage = parsed_reply["usage_metadata"]
+        cost = 0 if cached else token_cost(model_name, usage["input_tokens"], usage["output_tokens"])
+        tracker.record(current_section(), model_name, usage["input_tokens"], usage["output_tokens"], cost, cached)
+
+    def _downgraded_llm(self, downgrade_model):
+        if downgrade_model is None or downgrade_model == getattr(self.llm, "model_name", None):
+            return self.llm
+        if downgrade_model not in self._downgraded_llms:
+            logger.info(f"Usage budget exceeded, downgrading {current_section()} to {downgrade_model}")
+            self._downgraded_llms[downgrade_model] = self.llm.model_copy(update={"model_name": downgrade_model})
+        return self._downgraded_llms[downgrade_model]
+
+    def _llm_for_budget(self):
+        # Con il budget superato si interrompe (BudgetExceededError) o si passa al modello di ripiego
+        tracker = current_tracker()
+        downgrade_model = tracker.check() if tracker is not None else None
+        if downgrade_model is not None and downgrade_model == getattr(self.llm, "model_name", None):
+            # Il ripiego è il modello già in uso: non ridurrebbe la spesa, quindi vale come "abort"
+            if not self._same_model_downgrade_logged:
+                self._same_model_downgrade_logged = True
+                logger.warning(f"Budget downgrade model {downgrade_model} is the model already in use, "
+                               f"stopping instead of downgrading")
+            raise BudgetExceededError(f"Usage budget exceeded and no cheaper model than {downgrade_model}: "
+                                      f"{tracker.totals()}")
+        return self._downgraded_llm(downgrade_model)
+
+    def budget_llm(self):
+        # Il modello che userebbe la prossima chiamata, senza sollevare BudgetExceededError
+        tracker = current_tracker()
+        if tracker is None or tracker.on_exceeded != "downgrade" or not tracker.exceeded():
+            return self.llm
+        return self._downgraded_llm(tracker.downgrade_model)
+
+    def _llm_and_cached_reply(self, messages):
+        try:
+            llm = self._llm_for_budget()
+        except BudgetExceededError:
+            # Una risposta in cache non costa nulla: si restituisce anche a budget esaurito
+            _, cached_reply = self._cached_reply(self.llm, messages)
+            if cached_reply is None:
+                raise
+            return self.llm, None, cached_reply
+        cache_key, cached_reply = self._cached_reply(llm, messages)
+        return llm, cache_key, cached_reply
+
+    def account_reply(self, messages, reply: AIMessage) -> Dict[str, Dict]:
+        # Log della chiamata e utilizzo nel tracker corrente, anche per risposte ottenute
+        # fuori da questo wrapper (es. la modalità bulk)
+        parsed_reply = self.parse_llmresult(reply)
+        LLMLogger.log_request(prompts=messages, parsed_reply=parsed_reply)
+        self._record_usage(parsed_reply)
+        return parsed_reply
 
+    def _handle_reply(self, messages, reply: AIMessage, cache_key, estimated_tokens: int):
+        parsed_reply = self.account_reply(messages, reply)
+        self.rate_limiter.update_from_headers(reply.response_metadata.get("headers"))
+        self.rate_limiter.reconcile(estimated_tokens, parsed_reply["usage_metadata"]["total_tokens"])
+        cache = self.cache
+        if cache_key is not None and cache is not None:
+            cache.put(cache_key, reply)
+
+    def _count_hedge_loser(self, policy, future, estimated_tokens: int):
+        # La risposta scartata consuma comunque token: entrano nelle statistiche di hedging,
+        # nel rate limiter e nel tracker della generazione, al posto della stima
+        if future.cancelled() or future.exception() is not None:
+            return
+        parsed_reply = self.parse_llmresult(future.result())
+        actual_tokens = parsed_reply["usage_metadata"]["total_tokens"] or estimated_tokens
+        policy.record_hedge_result(False, actual_tokens - estimated_tokens)
+        self.rate_limiter.reconcile(estimated_tokens, actual_tokens)
+        self._record_usage(parsed_reply)
+
+    def _abandon_hedged(self, policy, future, estimated_tokens: int):
+        # Un thread non si può interrompere: la risposta abbandonata viene solo contata, nel
+        # contesto del chiamante (tracker e sezione) anche se arriva dopo
+        future.cancel()
+        context = contextvars.copy_context()
+        future.add_done_callback(lambda future: context.run(self._count_hedge_loser, policy, future, estimated_tokens))
+
+    def _invoke(self, llm, messages, estimated_tokens: int) -> AIMessage:
+        policy = self.hedge_policy
+        if policy is None:
+            return llm.invoke(messages)
+        key = (getattr(llm, "model_name", None), current_section())
+        delay = policy.hedge_delay(key)
+        started = time.monotonic()
+        if delay is None:
+            reply = llm.invoke(messages)
+            policy.record_latency(key, time.monotonic() - started)
+            return reply
+
+        executor = get_hedge_executor()
+        primary = executor.submit(contextvars.copy_context().run, llm.invoke, messages)
+        done, _ = wait([primary], timeout=delay)
+        if done or not policy.try_hedge(estimated_tokens):
+            reply = primary.result()
+            policy.record_latency(key, time.monotonic() - started)
+            return reply
+        logger.debug(f"Hedging {current_section()} request after {delay:.2f}s")
+        try:
+            self.rate_limiter.acquire(estimated_tokens)
+        except DeadlineExceededError:
+            self._abandon_hedged(policy, primary, estimated_tokens)
+            raise
+        hedge = executor.submit(contextvars.copy_context().run, llm.invoke, messages)
+        is_hedge = {primary: False, hedge: True}
+        pending = set(is_hedge)
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                policy.record_latency(key, time.monotonic() - started)
+                if is_hedge[future]:
+                    policy.record_hedge_result(True)
+                for loser in (pending | done) - {future}:
+                    self._abandon_hedged(policy, loser, estimated_tokens)
+                return future.result()
+        raise error
+
+    async def _ainvoke(self, llm, messages, estimated_tokens: int) -> AIMessage:
+        policy = self.hedge_policy
+        if policy is None:
+            return await llm.ainvoke(messages)
+        key = (getattr(llm, "model_name", None), current_section())
+        delay = policy.hedge_delay(key)
+        started = time.monotonic()
+        # Task in volo, True per il duplicato
+        is_hedge = {asyncio.ensure_future(llm.ainvoke(messages)): False}
+        try:
+            primary = next(iter(is_hedge))
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+            if delay is None or done or not policy.try_hedge(estimated_tokens):
+                reply = await primary
+                policy.record_latency(key, time.monotonic() - started)
+                return reply
+            logger.debug(f"Hedging {current_section()} request after {delay:.2f}s")
+            await self.rate_limiter.aacquire(estimated_tokens)
+            is_hedge[asyncio.ensure_future(llm.ainvoke(messages))] = True
+            pending = set(is_hedge)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is None:
+                    error = next(iter(done)).exception()
+                    continue
+                policy.record_latency(key, time.monotonic() - started)
+                if is_hedge[winner]:
+                    policy.record_hedge_result(True)
+                # Risposta arrivata insieme a quella vincente: i suoi token sono già spesi
+                for loser in done - {winner}:
+                    self._count_hedge_loser(policy, loser, estimated_tokens)
+                return winner.result()
+            raise error
+        finally:
+            # Anche se il chiamante viene annullato (es. da wait_for alla scadenza) nessuna
+            # richiesta resta in volo
+            for task in is_hedge:
+                if not task.done():
+                    task.cancel()
+
+    def _retry_wait(self, err: Exception, attempt: int, started: float) -> float:
+        # Secondi da attendere prima del prossimo tentativo; rilancia err se non conviene riprovare
+        if is_upstream_failure(err):
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.release_probe()
+        if not is_retryable(err):
+            logger.error(f"Non-retryable error from the model: {err}")
+            raise err
+        max_attempts = global_config.LLM_RETRY_MAX_ATTEMPTS
+        if attempt + 1 >= max_attempts:
+            logger.error(f"Failed to get a response from the model after {max_attempts} attempts: {err}")
+            raise err
+        backoff = backoff_delay(attempt, global_config.LLM_RETRY_BASE_DELAY, global_config.LLM_RETRY_MAX_DELAY)
+        server_wait = retry_after(err) if is_rate_limit(err) else None
+        # Il jitter evita che i thread fermati dallo stesso 429 ripartano insieme
+        wait_time = server_wait + random.uniform(0, 1) if server_wait is not None else backoff
+        if time.monotonic() - started + wait_time > global_config.LLM_RETRY_BUDGET:
+            logger.error(f"Retry budget of {global_config.LLM_RETRY_BUDGET}s exhausted: {err}")
+            raise err
+        ensure_time_for(wait_time)
+        if server_wait is not None:
+            # Solo quando si riprova davvero: l'attesa indicata dal servizio vale per tutto il processo
+            self.rate_limiter.pause(server_wait)
+        logger.warning(f"Model call failed ({err}), retrying in {wait_time:.1f}s (attempt {attempt + 1}/{max_attempts})")
+        return wait_time
 
     def __call__(self, messages: List[Dict[str, str]]) -> str:
-        max_retries = 15
-        retry_delay = 10
+        llm, cache_key, cached_reply = self._llm_and_cached_reply(messages)
+        if cached_reply is not None:
+            return cached_reply
 
-        for attempt in range(max_retries):
+        estimated_tokens = self.estimate_request_tokens(messages)
+        started = time.monotonic()
+
+        for attempt in itertools.count():
+            check_deadline()
+            # Con il circuito aperto la richiesta fallisce subito, senza occupare il thread in attese
+            probe = self.circuit_breaker.before_call()
             try:
+                self.rate_limiter.acquire(estimated_tokens)
+                reply = self._invoke(llm, messages, estimated_tokens)
+                self.circuit_breaker.record_success()
+                self._handle_reply(messages, reply, cache_key, estimated_tokens)
+                return reply
+            except Exception as err:
+                time.sleep(self._retry_wait(err, attempt, started))
+            except BaseException:
+                # Es. KeyboardInterrupt: la prova non dice nulla sul servizio ma va restituita
+                if probe:
+                    self.circuit_breaker.release_probe()
+                raise
+
+    async def acall(self, messages: List[Dict[str, str]]) -> str:
+        llm, cache_key, cached_reply = self._llm_and_cached_reply(messages)
+        if cached_reply is not None:
+            return cached_reply
+
+        estimated_tokens = self.estimate_request_tokens(messages)
+        started = time.monotonic()
 
-                reply = self.llm(messages)
-                parsed_reply = self.parse_llmresult(reply)
-                LLMLogger.log_request(prompts=messages, parsed_reply=parsed_reply)
+        for attempt in itertools.count():
+            check_deadline()
+            probe = self.circuit_breaker.before_call()
+            try:
+                await self.rate_limiter.aacquire(estimated_tokens)
+                reply = await self._ainvoke(llm, messages, estimated_tokens)
+                self.circuit_breaker.record_success()
+                self._handle_reply(messages, reply, cache_key, estimated_tokens)
                 return reply
-            except (openai.RateLimitError, HTTPStatusError) as err:
-                if isinstance(err, HTTPStatusError) and err.response.status_code == 429:
-                    self.logger.warning(f"HTTP 429 Too Many Requests: Waiting for {retry_delay} seconds before retrying (Attempt {attempt + 1}/{max_retries})...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
-                else:
-                    wait_time = self.parse_wait_time_from_error_message(str(err))
-                    self.logger.warning(f"Rate limit exceeded or API error. Waiting for {wait_time} seconds before retrying (Attempt {attempt + 1}/{max_retries})...")
-                    time.sleep(wait_time)
-            except Exception as e:
-                self.logger.error(f"Unexpected error occurred: {str(e)}, retrying in {retry_delay} seconds... (Attempt {attempt + 1}/{max_retries})")
-                time.sleep(retry_delay)
-                retry_delay *= 2
-
-        self.logger.critical("Failed to get a response from the model after multiple attempts.")
-        raise Exception("Failed to get a response from the model after multiple attempts.")
+            except Exception as err:
+                # Il backoff non blocca l'event loop: le altre sezioni proseguono
+                await asyncio.sleep(self._retry_wait(err, attempt, started))
+            except BaseException:
+                # CancelledError (scadenza con wait_for, hedging): senza rilasciare la prova il
+                # circuito resterebbe half_open e rifiuterebbe ogni chiamata successiva
+                if probe:
+                    self.circuit_breaker.release_probe()
+                raise
+
+    def stream(self, messages) -> Iterator[str]:
+        # Restituisce i token man mano che arrivano; i retry sono possibili solo prima del primo token
+        llm, cache_key, cached_reply = self._llm_and_cached_reply(messages)
+        if cached_reply is not None:
+            yield cached_reply.content
+            return
 
+        estimated_tokens = self.estimate_request_tokens(messages)
+        started = time.monotonic()
+
+        for attempt in itertools.count():
+            check_deadline()
+            probe = self.circuit_breaker.before_call()
+            streamed = None
+            try:
+                self.rate_limiter.acquire(estimated_tokens)
+                for chunk in llm.stream(messages):
+                    check_deadline()
+                    streamed = chunk if streamed is None else streamed + chunk
+                    if chunk.content:
+                        yield chunk.content
+                if streamed is None:
+                    raise EmptyStreamError("The model returned an empty stream.")
+                self.circuit_breaker.record_success()
+                reply = AIMessage(
+                    content=streamed.content,
+                    id=streamed.id,
+                    response_metadata=streamed.response_metadata,
+                    usage_metadata=streamed.usage_metadata,
+                )
+                self._handle_reply(messages, reply, cache_key, estimated_tokens)
+                return
+            except Exception as err:
+                if isinstance(err, DeadlineExceededError) or (streamed is not None and streamed.content):
+                    if probe:
+                        self.circuit_breaker.release_probe()
+                    raise
+                time.sleep(self._retry_wait(err, attempt, started))
+            except BaseException:
+                # GeneratorExit se il consumatore abbandona lo stream
+                if probe:
+                    self.circuit_breaker.release_probe()
+                raise
+
+    def estimate_request_tokens(self, messages) -> int:
+        # Token di input stimati più la risposta attesa, come li conteggia il limite TPM
+        prompt_text = "\n".join(content for _, content in render_messages(messages))
+        return estimate_tokens(prompt_text) + global_config.LLM_EXPECTED_OUTPUT_TOKENS
 
     def parse_llmresult(self, llmresult: AIMessage) -> Dict[str, Dict]:
         # Parse the LLM result into a structured format.
         content = llmresult.content
         response_metadata = llmresult.response_metadata
         id_ = llmresult.id
-        usage_metadata = llmresult.usage_metadata
+        usage_metadata = llmresult.usage_metadata or {}
 
         parsed_result = {
             "content": content,
@@ -160,15 +487,62 @@ class LoggerChatModel:
         }
         return parsed_result
 
+    def parse_wait_time_from_error_message(self, error_message: str) -> int:
+        # Extract wait time from error message
+        match = re.search(r"Please try again in (\d+)([smhd])", error_message)
+        if match:
+            value, unit = match.groups()
+            value = int(value)
+            if unit == "s":
+                return value
+            elif unit == "m":
+                return value * 60
+            elif unit == "h":
+                return value * 3600
+            elif unit == "d":
+                return value * 86400
+        # Default wait time if not found
+        return 30
+
 
 class LLMResumer:
-    def __init__(self, openai_api_key, strings):
-        self.llm_cheap = LoggerChatModel(
-            ChatOpenAI(
-                model_name="gpt-4o-mini", openai_api_key=openai_api_key, temperature=0.4
-            )
-        )
+    # Sezioni nell'ordine in cui compaiono nel documento, con il prompt corrispondente nel modulo strings
+    section_prompts = {
+        "header": "prompt_header",
+        "education": "prompt_education",
+        "work_experience": "prompt_working_experience",
+        "side_projects": "prompt_side_projects",
+        "achievements": "prompt_achievements",
+        "certifications": "prompt_certifications",
+        "additional_skills": "prompt_additional_skills",
+    }
+
+    # Struttura del body: testo statico seguito dalla sezione da inserire (None per la chiusura)
+    document_layout = (
+        ("<body>\n  ", "header"),
+        ("\n  <main>\n    ", "education"),
+        ("\n    ", "work_experience"),
+        ("\n    ", "side_projects"),
+        ("\n    ", "achievements"),
+        ("\n    ", "certifications"),
+        ("\n    ", "additional_skills"),
+        ("\n  </main>\n</body>", None),
+    )
+
+    def __init__(self, openai_api_key, strings, llm=None):
+        if llm is not None:
+            # Qualsiasi chat model LangChain, ad esempio quelli di fake_llm per i benchmark
+            self.llm_cheap = LoggerChatModel(llm)
+        else:
+            # Client condiviso dal processo, con il pool di connessioni HTTP riutilizzato tra i resume
+            self.llm_cheap = get_logger_chat_model(openai_api_key, "gpt-4o-mini", 0.4)
         self.strings = strings
+        self.prompt_pack = prompt_pack(strings)
+        self.prompt_registry = get_prompt_registry()
+        self.section_store = get_section_store()
+        # Per ogni sezione dell'ultima generazione: "reused", "generated" o "failed"
+        self.section_report = {}
+        self.job_description = None
 
     @staticmethod
     def _preprocess_template_string(template: str) -> str:
@@ -178,202 +552,503 @@ class LLMResumer:
     def set_resume(self, resume):
         self.resume = resume
 
-    def generate_header(self) -> str:
-        header_prompt_template = self._preprocess_template_string(
-            self.strings.prompt_header
-        )
-        prompt = ChatPromptTemplate.from_template(header_prompt_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        output = chain.invoke({
-            "personal_information": self.resume.personal_information
-        })
+    def _skills(self) -> set:
+        skills = set()
+        if self.resume.experience_details:
+            for exp in self.resume.experience_details:
+                if exp.skills_acquired:
+                    skills.update(exp.skills_acquired)
+
+        if self.resume.education_details:
+            for edu in self.resume.education_details:
+                if edu.exam:
+                    for exam in edu.exam:
+                        skills.update(exam.keys())
+        return skills
+
+    def _section_inputs(self, section: str) -> Dict:
+        if section == "header":
+            return {"personal_information": self.resume.personal_information}
+        if section == "education":
+            return {"education_details": self.resume.education_details}
+        if section == "work_experience":
+            return {"experience_details": self.resume.experience_details}
+        if section == "side_projects":
+            return {"projects": self.resume.projects}
+        if section == "achievements":
+            return {
+                "achievements": self.resume.achievements,
+                "certifications": self.resume.certifications,
+                "job_description": self.job_description,
+            }
+        if section == "certifications":
+            return {
+                "certifications": self.resume.certifications,
+                "job_description": self.job_description,
+            }
+        if section == "additional_skills":
+            return {
+                "languages": self.resume.languages,
+                "interests": self.resume.interests,
+                "skills": self._skills(),
+            }
+        raise ValueError(f"Unknown section: {section}")
+
+    def _used_inputs(self, section: str) -> Dict:
+        # Solo i campi che il prompt della sezione formatta: gli altri non devono cambiarne la
+        # chiave nel section store (es. le certificazioni per achievements)
+        variables = set(self._section_prompt(section).input_variables)
+        return {name: value for name, value in self._section_inputs(section).items() if name in variables}
+
+    def _prompt_inputs(self, section: str, mode: str = None) -> Dict:
+        return serialize_inputs(self._used_inputs(section), mode or global_config.PROMPT_SERIALIZATION)
+
+    def prompt_token_report(self) -> Dict[str, Dict]:
+        # Token stimati e costo di input di ogni prompt, con la serializzazione compatta e con il repr
+        input_price, _ = model_prices(getattr(self.llm_cheap.llm, "model_name", None))
+        report = {}
+        for section in self._sections_to_generate():
+            prompt = self._section_prompt(section)
+            entry = {}
+            for mode in ("compact", "repr"):
+                tokens = estimate_tokens(prompt.format(**self._prompt_inputs(section, mode)))
+                entry[mode] = {"tokens": tokens, "cost": tokens * input_price}
+            entry["saved_tokens"] = entry["repr"]["tokens"] - entry["compact"]["tokens"]
+            report[section] = entry
+        return report
+
+    def _section_enabled(self, section: str) -> bool:
+        if section == "additional_skills":
+            return bool(self.resume.experience_details or self.resume.education_details or
+                        self.resume.languages or self.resume.interests)
+        resume_fields = {
+            "header": self.resume.personal_information,
+            "education": self.resume.education_details,
+            "work_experience": self.resume.experience_details,
+            "side_projects": self.resume.projects,
+            "achievements": self.resume.achievements,
+            "certifications": self.resume.certifications,
+        }
+        return bool(resume_fields[section])
+
+    def _section_prompt(self, section: str) -> ChatPromptTemplate:
+        template = getattr(self.strings, self.section_prompts[section])
+        return self.prompt_registry.prompt(self.prompt_pack, section, template)
+
+    def _section_chain(self, section: str):
+        template = getattr(self.strings, self.section_prompts[section])
+        return self.prompt_registry.chain(self.prompt_pack, section, template, self.llm_cheap)
+
+    def _section_key(self, section: str):
+        if self.section_store is None:
+            return None
+        template = getattr(self.strings, self.section_prompts[section])
+        # Modello scelto dal budget in questo momento, come la chiave della cache LLM
+        return self.section_store.make_key(section, self._used_inputs(section), template, self.llm_cheap.budget_llm())
+
+    def _stored_section(self, section: str):
+        key = self._section_key(section)
+        stored = self.section_store.get(key) if key is not None else None
+        if stored is not None:
+            logger.debug(f"Reusing stored {section} section")
+            self.section_report[section] = "reused"
+        return key, stored
+
+    def _store_section(self, section: str, key, output: str):
+        # Se la sezione è già stata sostituita da un ripiego per scadenza, il report non cambia
+        self.section_report.setdefault(section, "generated")
+        # Se il budget ha cambiato modello durante la generazione la sezione non si può attribuire a una chiave
+        if key is not None and output and key == self._section_key(section):
+            self.section_store.put(key, output)
+
+    def _fallback_section(self, section: str) -> str:
+        # Sezione scaduta: copia salvata o risposta LLM in cache (anche oltre il TTL),
+        # altrimenti la versione deterministica o niente, secondo SECTION_FALLBACK
+        key = self._section_key(section)
+        output = self.section_store.get(key) if key is not None else None
+        cache = self.llm_cheap.cache
+        if output is None and cache is not None:
+            messages = self._section_prompt(section).invoke(self._prompt_inputs(section))
+            cached_reply = cache.get(cache.make_key(self.llm_cheap.budget_llm(), messages), ignore_ttl=True)
+            output = cached_reply.content if cached_reply is not None else None
+        if output is not None:
+            state = "degraded:cached"
+        elif global_config.SECTION_FALLBACK == "deterministic":
+            state, output = "degraded:deterministic", deterministic_section_html(section, self._used_inputs(section))
+        else:
+            state, output = "degraded:omitted", ""
+        self.section_report[section] = state
+        logger.warning(f"{section} section missed its deadline, using {state}")
         return output
 
-    def generate_education_section(self) -> str:
-        education_prompt_template = self._preprocess_template_string(
-            self.strings.prompt_education
-        )
-        prompt = ChatPromptTemplate.from_template(education_prompt_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        output = chain.invoke({
-            "education_details": self.resume.education_details,
-        })
+    def _generate_section(self, section: str) -> str:
+        key, stored = self._stored_section(section)
+        if stored is not None:
+            return stored
+        logging.debug(f"Starting {section} section generation")
+        with section_scope(section), deadline_scope(global_config.SECTION_DEADLINE):
+            output = self._section_chain(section).invoke(self._prompt_inputs(section))
+        logging.debug(f"{section} section generation completed")
+        self._store_section(section, key, output)
         return output
 
-    def generate_work_experience_section(self) -> str:
-        work_experience_prompt_template = self._preprocess_template_string(
-            self.strings.prompt_working_experience
-        )
-        prompt = ChatPromptTemplate.from_template(work_experience_prompt_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        output = chain.invoke({
-            "experience_details": self.resume.experience_details
-        })
+    async def _agenerate_section(self, section: str) -> str:
+        key, stored = self._stored_section(section)
+        if stored is not None:
+            return stored
+        logging.debug(f"Starting {section} section generation")
+        with section_scope(section), deadline_scope(global_config.SECTION_DEADLINE):
+            try:
+                # wait_for interrompe anche una richiesta HTTP in corso
+                output = await asyncio.wait_for(
+                    self._section_chain(section).ainvoke(self._prompt_inputs(section)), remaining_time()
+                )
+            except asyncio.TimeoutError as exc:
+                raise DeadlineExceededError(f"{section} section deadline exceeded") from exc
+        logging.debug(f"{section} section generation completed")
+        self._store_section(section, key, output)
         return output
 
+    def _stream_section(self, section: str) -> Iterator[str]:
+        key, stored = self._stored_section(section)
+        if stored is not None:
+            yield stored
+            return
+        prompt_value = self._section_prompt(section).invoke(self._prompt_inputs(section))
+        tokens = []
+        with section_scope(section), deadline_scope(global_config.SECTION_DEADLINE):
+            for token in self.llm_cheap.stream(prompt_value):
+                tokens.append(token)
+                yield token
+        self._store_section(section, key, "".join(tokens))
+
+    def _generation_units(self, sections: List[str]) -> List[tuple]:
+        # Un'unità è una richiesta: i gruppi di SECTION_FUSION_GROUPS con almeno due sezioni
+        # da generare, poi le altre sezioni da sole
+        units, fused = [], set()
+        for group in global_config.SECTION_FUSION_GROUPS:
+            members = tuple(section for section in group if section in sections and section not in fused)
+            if len(members) > 1:
+                units.append(members)
+                fused.update(members)
+        units.extend((section,) for section in sections if section not in fused)
+        return units
+
+    def _fused_prompt_value(self, sections: List[str]) -> StringPromptValue:
+        # La job description, quando serve, viene inviata una volta sola in testa alla richiesta
+        tasks, job_description = [], None
+        for section in sections:
+            inputs = self._prompt_inputs(section)
+            if inputs.get("job_description"):
+                job_description = inputs["job_description"]
+                inputs["job_description"] = JOB_DESCRIPTION_REFERENCE
+            messages = self._section_prompt(section).format_messages(**inputs)
+            tasks.append((section, "\n\n".join(message.content for message in messages)))
+        return StringPromptValue(text=fused_prompt(tasks, job_description))
+
+    def _pending_fused(self, sections: tuple):
+        results, keys = {}, {}
+        for section in sections:
+            keys[section], stored = self._stored_section(section)
+            if stored is not None:
+                results[section] = stored
+        return results, keys, [section for section in sections if section not in results]
+
+    def _store_fused(self, reply: AIMessage, pending: List[str], keys: Dict, results: Dict[str, str]) -> List[str]:
+        # Restituisce le sezioni assenti dalla risposta, da rigenerare con la loro richiesta
+        fragments = split_fused_reply(reply.content, pending)
+        for section in pending:
+            if section in fragments:
+                self._store_section(section, keys[section], fragments[section])
+                results[section] = fragments[section]
+        missing = [section for section in pending if section not in fragments]
+        if missing:
+            logger.warning(f"Fused reply is missing {', '.join(missing)}, generating separately")
+        return missing
+
+    def _generate_unit(self, sections: tuple) -> Dict[str, str]:
+        if len(sections) == 1:
+            return {sections[0]: self._generate_section(sections[0])}
+        results, keys, pending = self._pending_fused(sections)
+        if len(pending) == 1:
+            results[pending[0]] = self._generate_section(pending[0])
+        elif pending:
+            logging.debug(f"Starting fused generation of {', '.join(pending)}")
+            with section_scope("+".join(pending)), deadline_scope(global_config.SECTION_DEADLINE):
+                reply = self.llm_cheap(self._fused_prompt_value(pending))
+            for section in self._store_fused(reply, pending, keys, results):
+                results[section] = self._generate_section(section)
+        return results
+
+    async def _agenerate_unit(self, sections: tuple, semaphore: asyncio.Semaphore = None) -> Dict[str, str]:
+        if len(sections) == 1:
+            return {sections[0]: await self._agenerate_limited(sections[0], semaphore)}
+        results, keys, pending = self._pending_fused(sections)
+        if len(pending) == 1:
+            results[pending[0]] = await self._agenerate_limited(pending[0], semaphore)
+        elif pending:
+            logging.debug(f"Starting fused generation of {', '.join(pending)}")
+            with section_scope("+".join(pending)), deadline_scope(global_config.SECTION_DEADLINE):
+                try:
+                    reply = await asyncio.wait_for(
+                        self._acall_limited(self._fused_prompt_value(pending), semaphore), remaining_time()
+                    )
+                except asyncio.TimeoutError as exc:
+                    raise DeadlineExceededError(f"{'+'.join(pending)} sections deadline exceeded") from exc
+            missing = self._store_fused(reply, pending, keys, results)
+            outputs = await asyncio.gather(*(self._agenerate_limited(section, semaphore) for section in missing))
+            results.update(zip(missing, outputs))
+        return results
+
+    def generate_header(self) -> str:
+        return self._generate_section("header")
+
+    def generate_education_section(self) -> str:
+        return self._generate_section("education")
+
+    def generate_work_experience_section(self) -> str:
+        return self._generate_section("work_experience")
+
     def generate_side_projects_section(self) -> str:
-        side_projects_prompt_template = self._preprocess_template_string(
-            self.strings.prompt_side_projects
-        )
-        prompt = ChatPromptTemplate.from_template(side_projects_prompt_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        output = chain.invoke({
-            "projects": self.resume.projects
-        })
-        return output
+        return self._generate_section("side_projects")
 
     def generate_achievements_section(self) -> str:
-        logging.debug("Starting achievements section generation")
+        return self._generate_section("achievements")
 
-        achievements_prompt_template = self._preprocess_template_string(
-            self.strings.prompt_achievements
-        )
-        logging.debug(f"Achievements template: {achievements_prompt_template}")
+    def generate_certifications_section(self) -> str:
+        return self._generate_section("certifications")
 
-        prompt = ChatPromptTemplate.from_template(achievements_prompt_template)
-        logging.debug(f"Prompt: {prompt}")
+    def generate_additional_skills_section(self) -> str:
+        return self._generate_section("additional_skills")
 
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        logging.debug(f"Chain created: {chain}")
+    def _sections_to_generate(self) -> List[str]:
+        return [section for section in self.section_prompts if self._section_enabled(section)]
 
-        input_data = {
-            "achievements": self.resume.achievements,
-            "certifications": self.resume.certifications,
-            "job_description": self.job_description
-        }
-        logging.debug(f"Input data for the chain: {input_data}")
+    @classmethod
+    def _assemble_html(cls, results: Dict[str, str]) -> str:
+        return "".join(prefix + results.get(section, "") for prefix, section in cls.document_layout)
 
-        output = chain.invoke(input_data)
-        logging.debug(f"Chain invocation result: {output}")
+    def _log_section_report(self):
+        reused = [section for section, state in self.section_report.items() if state == "reused"]
+        logger.info(f"Reused {len(reused)} of {len(self.section_report)} sections: {', '.join(reused) or 'none'}")
 
-        logging.debug("Achievements section generation completed")
-        return output
+    def _run_unit(self, unit: tuple, started: Dict[tuple, float]) -> Dict[str, str]:
+        started[unit] = time.monotonic()
+        return self._generate_unit(unit)
 
-    def generate_certifications_section(self) -> str:
-        logging.debug("Starting Certifications section generation")
+    def _expired_units(self, pending, future_to_unit, started, resume_deadline):
+        # Unità oltre la scadenza del resume o, se già partite, oltre SECTION_DEADLINE
+        now = time.monotonic()
+        section_deadline = global_config.SECTION_DEADLINE
+        return [
+            future for future in pending
+            if not future.done() and (
+                (resume_deadline is not None and now >= resume_deadline) or
+                (section_deadline is not None and future_to_unit[future] in started and
+                 now >= started[future_to_unit[future]] + section_deadline)
+            )
+        ]
 
-        certifications_prompt_template = self._preprocess_template_string(
-            self.strings.prompt_certifications
-        )
-        logging.debug(f"Certifications template: {certifications_prompt_template}")
+    def _next_wait(self, pending, future_to_unit, started, resume_deadline):
+        # Fino alla prossima scadenza possibile; un'unità non ancora partita non può scadere
+        # prima di SECTION_DEADLINE da adesso
+        now = time.monotonic()
+        section_deadline = global_config.SECTION_DEADLINE
+        limits = [resume_deadline - now] if resume_deadline is not None else []
+        if section_deadline is not None:
+            limits.extend(
+                started[future_to_unit[future]] + section_deadline - now if future_to_unit[future] in started
+                else section_deadline
+                for future in pending
+            )
+        return max(0.0, min(limits)) if limits else None
 
-        prompt = ChatPromptTemplate.from_template(certifications_prompt_template)
-        logging.debug(f"Prompt: {prompt}")
+    def generate_html_resume(self) -> str:
+        self.section_report = {}
+        # Le sezioni passano dall'executor condiviso dal processo, che limita le chiamate in volo.
+        # La scadenza del resume viene copiata nel contesto di ogni sezione; qui si attende ogni
+        # unità al massimo fino alla sua scadenza, anche se il thread è bloccato in una richiesta
+        executor = get_section_executor()
+        started = {}
+        with deadline_scope(global_config.RESUME_DEADLINE):
+            future_to_unit = {
+                executor.submit(self._run_unit, unit, started): unit
+                for unit in self._generation_units(self._sections_to_generate())
+            }
+            timeout = remaining_time()
+        resume_deadline = time.monotonic() + timeout if timeout is not None else None
+        results = {}
+        pending = set(future_to_unit)
+        try:
+            while pending:
+                for future in self._expired_units(pending, future_to_unit, started, resume_deadline):
+                    # L'unità viene abbandonata; il thread si ferma alla sua scadenza
+                    pending.discard(future)
+                    future.cancel()
+                    for section in future_to_unit[future]:
+                        results[section] = self._fallback_section(section)
+                if not pending:
+                    break
+                done, pending = wait(
+                    pending, timeout=self._next_wait(pending, future_to_unit, started, resume_deadline),
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    unit = future_to_unit[future]
+                    try:
+                        results.update(future.result())
+                    except DeadlineExceededError:
+                        for section in unit:
+                            results[section] = self._fallback_section(section)
+                    except BudgetExceededError:
+                        raise
+                    except Exception as exc:
+                        for section in unit:
+                            self.section_report[section] = "failed"
+                        logger.error(f"{'+'.join(unit)} generated an exception: {exc}")
+        except BudgetExceededError:
+            for future in future_to_unit:
+                future.cancel()
+            raise
+        self._log_section_report()
+        return self._assemble_html({section: output for section, output in results.items() if output})
 
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        logging.debug(f"Chain created: {chain}")
+    def uses_job_description(self, section: str) -> bool:
+        return "job_description" in self._section_prompt(section).input_variables
 
-        input_data = {
-            "certifications": self.resume.certifications,
-            "job_description": self.job_description
-        }
-        logging.debug(f"Input data for the chain: {input_data}")
+    async def _agenerate_limited(self, section: str, semaphore: asyncio.Semaphore = None) -> str:
+        # Oltre al semaforo del batch, un posto nell'executor condiviso con le sezioni in thread:
+        # il limite globale e il turno per tenant valgono anche per asyncio
+        if semaphore is None:
+            async with get_section_executor().slot():
+                return await self._agenerate_section(section)
+        async with semaphore, get_section_executor().slot():
+            return await self._agenerate_section(section)
 
-        output = chain.invoke(input_data)
-        logging.debug(f"Chain invocation result: {output}")
+    async def _acall_limited(self, prompt_value, semaphore: asyncio.Semaphore = None) -> AIMessage:
+        if semaphore is None:
+            async with get_section_executor().slot():
+                return await self.llm_cheap.acall(prompt_value)
+        async with semaphore, get_section_executor().slot():
+            return await self.llm_cheap.acall(prompt_value)
 
-        logging.debug("Certifications section generation completed")
-        return output
-    
-    
+    async def agenerate_html_resume(self, precomputed: Dict[str, str] = None,
+                                    semaphore: asyncio.Semaphore = None) -> str:
+        # Tutte le sezioni sono coroutine sullo stesso event loop, senza un thread per sezione.
+        # Le sezioni in precomputed (es. quelle comuni a più job description) non vengono rigenerate
+        precomputed = precomputed or {}
+        self.section_report = {section: "shared" for section in precomputed}
+        sections = [section for section in self._sections_to_generate() if section not in precomputed]
+        results = dict(precomputed)
+        with deadline_scope(global_config.RESUME_DEADLINE):
+            tasks = {
+                asyncio.ensure_future(self._agenerate_unit(unit, semaphore)): unit
+                for unit in self._generation_units(sections)
+            }
+            timeout = remaining_time()
+            if tasks:
+                _, pending = await asyncio.wait(tasks, timeout=max(0.0, timeout) if timeout is not None else None)
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        for task, unit in tasks.items():
+            if task.cancelled() or isinstance(task.exception(), DeadlineExceededError):
+                outputs = {section: self._fallback_section(section) for section in unit}
+            elif task.exception() is None:
+                outputs = task.result()
+            elif isinstance(task.exception(), BudgetExceededError):
+                raise task.exception()
+            else:
+                for section in unit:
+                    self.section_report[section] = "failed"
+                logger.error(f"{'+'.join(unit)} generated an exception: {task.exception()}")
+                continue
+            results.update((section, output) for section, output in outputs.items() if output)
+        self._log_section_report()
+        return self._assemble_html(results)
 
-    def generate_additional_skills_section(self) -> str:
-        additional_skills_prompt_template = self._preprocess_template_string(
-            self.strings.prompt_additional_skills
-        )
-        
-        skills = set()
+    def _stream_wait(self, section: str, started: Dict[str, float], resume_deadline):
+        # Attesa massima del prossimo token: fino alla scadenza del resume o della sezione; una
+        # sezione ancora in coda nell'executor non può scadere prima di SECTION_DEADLINE da adesso
+        now = time.monotonic()
+        section_deadline = global_config.SECTION_DEADLINE
+        limits = [resume_deadline - now] if resume_deadline is not None else []
+        if section_deadline is not None:
+            limits.append(started[section] + section_deadline - now if section in started else section_deadline)
+        return max(0.0, min(limits)) if limits else None
 
-        if self.resume.experience_details:
-            for exp in self.resume.experience_details:
-                if exp.skills_acquired:
-                    skills.update(exp.skills_acquired)
+    def _stream_expired(self, section: str, started: Dict[str, float], resume_deadline) -> bool:
+        now = time.monotonic()
+        section_deadline = global_config.SECTION_DEADLINE
+        return ((resume_deadline is not None and now >= resume_deadline) or
+                (section_deadline is not None and section in started and now >= started[section] + section_deadline))
 
-        if self.resume.education_details:
-            for edu in self.resume.education_details:
-                if edu.exam:
-                    for exam in edu.exam:
-                        skills.update(exam.keys())
-        prompt = ChatPromptTemplate.from_template(additional_skills_prompt_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        output = chain.invoke({
-            "languages": self.resume.languages,
-            "interests": self.resume.interests,
-            "skills": skills,
-        })
-        
-        return output
+    def iter_html_resume(self) -> Iterator[str]:
+        # Restituisce il body a frammenti nell'ordine del documento. Tutte le sezioni vengono
+        # generate in parallelo; quella in testa viene inoltrata token per token, le successive
+        # restano in coda finché non tocca a loro.
+        self.section_report = {}
+        sections = self._sections_to_generate()
+        queues = {section: queue.Queue() for section in sections}
+        # Inizio di ogni sezione e sezioni abbandonate alla scadenza: anche uno stream fermo
+        # in attesa del prossimo frammento viene sostituito dal ripiego
+        started = {}
+        abandoned = set()
 
-    def generate_html_resume(self) -> str:
-        # Define a list of functions to execute in parallel
-        def header_fn():
-            if self.resume.personal_information and self.job_description:
-                return self.generate_header()
-            return ""
-
-        def education_fn():
-            if self.resume.education_details and self.job_description:
-                return self.generate_education_section()
-            return ""
-
-        def work_experience_fn():
-            if self.resume.experience_details and self.job_description:
-                return self.generate_work_experience_section()
-            return ""
-
-        def side_projects_fn():
-            if self.resume.projects and self.job_description:
-                return self.generate_side_projects_section()
-            return ""
-
-        def achievements_fn():
-            if self.resume.achievements and self.job_description:
-                return self.generate_achievements_section()
-            return ""
-        
-        def certifications_fn():
-            if self.resume.certifications and self.job_description:
-                return self.generate_certifications_section()
-            return ""
-
-        def additional_skills_fn():
-            if (self.resume.experience_details or self.resume.education_details or
-                self.resume.languages or self.resume.interests) and self.job_description:
-                return self.generate_additional_skills_section()
-            return ""
-
-        # Create a dictionary to map the function names to their respective callables
-        functions = {
-            "header": header_fn,
-            "education": education_fn,
-            "work_experience": work_experience_fn,
-            "side_projects": side_projects_fn,
-            "achievements": achievements_fn,
-            "certifications": certifications_fn,
-            "additional_skills": additional_skills_fn,
-        }
+        def produce(section):
+            started[section] = time.monotonic()
+            try:
+                for token in self._stream_section(section):
+                    if section in abandoned:
+                        # Chiude lo stream: la richiesta non serve più
+                        break
+                    queues[section].put(token)
+            except (BudgetExceededError, DeadlineExceededError) as exc:
+                queues[section].put(exc)
+            except Exception as exc:
+                self.section_report[section] = "failed"
+                logger.error(f"{section} generated an exception: {exc}")
+            finally:
+                queues[section].put(None)
 
-        # Use ThreadPoolExecutor to run the functions in parallel
-        with ThreadPoolExecutor() as executor:
-            future_to_section = {executor.submit(fn): section for section, fn in functions.items()}
-            results = {}
-            for future in as_completed(future_to_section):
-                section = future_to_section[future]
-                try:
-                    result = future.result()
-                    if result:
-                        results[section] = result
-                except Exception as exc:
-                    print(f'{section} ha generato un\'eccezione: {exc}')
-        full_resume = "<body>\n"
-        full_resume += f"  {results.get('header', '')}\n"
-        full_resume += "  <main>\n"
-        full_resume += f"    {results.get('education', '')}\n"
-        full_resume += f"    {results.get('work_experience', '')}\n"
-        full_resume += f"    {results.get('side_projects', '')}\n"
-        full_resume += f"    {results.get('achievements', '')}\n"
-        full_resume += f"    {results.get('certifications', '')}\n"
-        full_resume += f"    {results.get('additional_skills', '')}\n"
-        full_resume += "  </main>\n"
-        full_resume += "</body>"
-        return full_resume
\ No newline at end of file
+        executor = get_section_executor()
+        futures = []
+        try:
+            with deadline_scope(global_config.RESUME_DEADLINE):
+                for section in sections:
+                    futures.append(executor.submit(produce, section))
+                deadline = remaining_time()
+            deadline = time.monotonic() + deadline if deadline is not None else None
+            for prefix, section in self.document_layout:
+                yield prefix
+                if section not in queues:
+                    continue
+                streamed = False
+                while True:
+                    try:
+                        token = queues[section].get(timeout=self._stream_wait(section, started, deadline))
+                    except queue.Empty:
+                        if not self._stream_expired(section, started, deadline):
+                            continue
+                        abandoned.add(section)
+                        token = DeadlineExceededError(f"{section} section missed its deadline")
+                    if token is None:
+                        break
+                    if isinstance(token, BudgetExceededError):
+                        raise token
+                    if isinstance(token, DeadlineExceededError):
+                        # I token già inviati non si possono ritirare: la sezione resta troncata
+                        if streamed:
+                            self.section_report[section] = "degraded:truncated"
+                            logger.warning(f"{section} section missed its deadline after streaming started")
+                        else:
+                            yield self._fallback_section(section)
+                        break
+                    streamed = True
+                    yield token
+            self._log_section_report()
+        finally:
+            # Le sezioni ancora in coda non servono più se il consumatore ha smesso di leggere
+            abandoned.update(sections)
+            for future in futures:
+                future.cancel()
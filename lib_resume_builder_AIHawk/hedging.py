@@ -0,0 +1,93 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Hashable, Optional
+from lib_resume_builder_AIHawk.config import global_config
+
+
+class HedgePolicy:
+    # Se una richiesta supera il percentile storico della sua latenza ne parte un duplicato;
+    # vince la prima risposta. max_hedge_rate limita la quota di richieste duplicate, e quindi il costo
+
+    def __init__(self, percentile: float, min_samples: int, max_hedge_rate: float, window: int):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_hedge_rate = max_hedge_rate
+        self.window = window
+        self._latencies: Dict[Hashable, deque] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedge_tokens = 0
+
+    def hedge_delay(self, key: Hashable) -> Optional[float]:
+        # Dopo quanti secondi mandare il duplicato, None finché lo storico è troppo corto
+        with self._lock:
+            self.requests += 1
+            samples = sorted(self._latencies.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * self.percentile))]
+
+    def record_latency(self, key: Hashable, seconds: float):
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def try_hedge(self, estimated_tokens: int) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.requests * self.max_hedge_rate:
+                return False
+            self.hedges += 1
+            self.hedge_tokens += estimated_tokens
+            return True
+
+    def record_hedge_result(self, hedge_won: bool, extra_tokens: int = 0):
+        # extra_tokens: differenza tra i token reali della risposta scartata e la stima già contata
+        with self._lock:
+            if hedge_won:
+                self.hedge_wins += 1
+            self.hedge_tokens += extra_tokens
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_rate": self.hedges / self.requests if self.requests else 0.0,
+                "hedge_wins": self.hedge_wins,
+                "hedge_tokens": self.hedge_tokens,
+            }
+
+
+_hedge_policy = None
+_hedge_policy_lock = threading.Lock()
+_hedge_executor = None
+
+
+def get_hedge_policy() -> Optional[HedgePolicy]:
+    global _hedge_policy
+    if not global_config.LLM_HEDGE_ENABLED:
+        return None
+    with _hedge_policy_lock:
+        if _hedge_policy is None:
+            _hedge_policy = HedgePolicy(
+                percentile=global_config.LLM_HEDGE_PERCENTILE,
+                min_samples=global_config.LLM_HEDGE_MIN_SAMPLES,
+                max_hedge_rate=global_config.LLM_HEDGE_MAX_RATE,
+                window=global_config.LLM_HEDGE_WINDOW,
+            )
+        return _hedge_policy
+
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    # Thread per le chiamate sincrone con hedging: la richiesta originale e il duplicato
+    # devono poter procedere insieme mentre il chiamante attende la prima risposta
+    global _hedge_executor
+    with _hedge_policy_lock:
+        if _hedge_executor is None:
+            # Fino a due chiamate (originale e duplicato) per ogni sezione in esecuzione
+            _hedge_executor = ThreadPoolExecutor(
+                max_workers=2 * global_config.SECTION_EXECUTOR_MAX_IN_FLIGHT, thread_name_prefix="llm-hedge"
+            )
+        return _hedge_executor
@@ -0,0 +1,78 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from langchain_core.messages.ai import AIMessage
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.disk_cache import DiskCache
+
+
+def render_messages(messages):
+    # Forma canonica dei messaggi inviati al modello, indipendente dal tipo di PromptValue
+    if hasattr(messages, "to_messages"):
+        messages = messages.to_messages()
+    elif isinstance(messages, str):
+        return [["human", messages]]
+    return [[message.type, message.content] for message in messages]
+
+
+class LLMResponseCache:
+
+    def __init__(self, directory: Path, ttl: Optional[float], max_bytes: int):
+        self.store = DiskCache(directory, max_bytes=max_bytes)
+        self.ttl = ttl
+
+    @staticmethod
+    def make_key(llm, messages) -> str:
+        return DiskCache.make_key(
+            getattr(llm, "model_name", None),
+            getattr(llm, "temperature", None),
+            render_messages(messages),
+        )
+
+    def get(self, key: str, ignore_ttl: bool = False) -> Optional[AIMessage]:
+        # ignore_ttl restituisce anche le risposte scadute, utili come ripiego
+        data = self.store.get_bytes(key)
+        if data is None:
+            return None
+        entry = json.loads(data)
+        if not ignore_ttl and self.ttl is not None and time.time() - entry["created"] > self.ttl:
+            return None
+        return AIMessage(
+            content=entry["content"],
+            id=entry["id"],
+            response_metadata=entry["response_metadata"],
+            usage_metadata=entry["usage_metadata"],
+        )
+
+    def put(self, key: str, reply: AIMessage):
+        entry = {
+            "created": time.time(),
+            "content": reply.content,
+            "id": reply.id,
+            "response_metadata": reply.response_metadata,
+            "usage_metadata": reply.usage_metadata,
+        }
+        self.store.put_bytes(key, json.dumps(entry, ensure_ascii=False, default=str).encode("utf-8"))
+
+    def stats(self):
+        return self.store.stats()
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    global _llm_cache
+    if not global_config.LLM_CACHE_ENABLED:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache(
+                Path(global_config.CACHE_DIRECTORY) / "llm",
+                ttl=global_config.LLM_CACHE_TTL,
+                max_bytes=global_config.LLM_CACHE_MAX_BYTES,
+            )
+        return _llm_cache
@@ -0,0 +1,123 @@
+import asyncio
+import atexit
+import threading
+import weakref
+from typing import Dict, Tuple
+import httpx
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from lib_resume_builder_AIHawk.config import global_config
+
+_lock = threading.Lock()
+_http_client = None
+_http_async_client = None
+_chat_models: Dict[Tuple, ChatOpenAI] = {}
+_logger_chat_models: Dict[Tuple, object] = {}
+_embeddings: Dict[str, OpenAIEmbeddings] = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=global_config.LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=global_config.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=global_config.LLM_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+class _LoopLocalAsyncClient(httpx.AsyncClient):
+    # Le connessioni di un httpx.AsyncClient appartengono all'event loop che le ha aperte, e ogni
+    # asyncio.run ne crea uno nuovo: le richieste passano al pool del loop in esecuzione,
+    # quelli dei loop già chiusi vengono scartati
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._client_kwargs = kwargs
+        self._loop_clients = weakref.WeakKeyDictionary()
+        self._loop_clients_lock = threading.Lock()
+
+    def _loop_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._loop_clients_lock:
+            for closed_loop in [other for other in self._loop_clients if other.is_closed()]:
+                del self._loop_clients[closed_loop]
+            client = self._loop_clients.get(loop)
+            if client is None:
+                client = self._loop_clients[loop] = httpx.AsyncClient(**self._client_kwargs)
+            return client
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        return await self._loop_client().send(request, **kwargs)
+
+    async def aclose(self):
+        # Chiude solo il pool del loop corrente, gli altri loop possono ancora usare il loro
+        with self._loop_clients_lock:
+            client = self._loop_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+def _http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    # Un solo pool di connessioni keep-alive per tutti i client (per il client async, uno per
+    # event loop): l'handshake TLS si paga una volta per connessione e non per ogni resume
+    global _http_client, _http_async_client
+    if _http_client is None:
+        _http_client = httpx.Client(limits=_limits(), timeout=global_config.LLM_HTTP_TIMEOUT)
+        _http_async_client = _LoopLocalAsyncClient(limits=_limits(), timeout=global_config.LLM_HTTP_TIMEOUT)
+    return _http_client, _http_async_client
+
+
+def get_chat_model(api_key: str, model_name: str = "gpt-4o-mini", temperature: float = 0.4) -> ChatOpenAI:
+    factory = global_config.LLM_FACTORY
+    key = (api_key, model_name, temperature, factory)
+    with _lock:
+        chat_model = _chat_models.get(key)
+        if chat_model is None and factory is not None:
+            chat_model = factory(model_name, temperature)
+            _chat_models[key] = chat_model
+        elif chat_model is None:
+            http_client, http_async_client = _http_clients()
+            chat_model = ChatOpenAI(
+                model_name=model_name, openai_api_key=api_key, temperature=temperature,
+                include_response_headers=True, stream_usage=True,
+                http_client=http_client, http_async_client=http_async_client,
+            )
+            _chat_models[key] = chat_model
+        return chat_model
+
+
+def get_logger_chat_model(api_key: str, model_name: str = "gpt-4o-mini", temperature: float = 0.4):
+    # Condividere anche il wrapper permette di riusare le chain già compilate
+    from lib_resume_builder_AIHawk.gpt_resume import LoggerChatModel
+    chat_model = get_chat_model(api_key, model_name, temperature)
+    key = (api_key, model_name, temperature, global_config.LLM_FACTORY)
+    with _lock:
+        logger_chat_model = _logger_chat_models.get(key)
+        if logger_chat_model is None:
+            logger_chat_model = LoggerChatModel(chat_model)
+            _logger_chat_models[key] = logger_chat_model
+        return logger_chat_model
+
+
+def get_embeddings(api_key: str) -> OpenAIEmbeddings:
+    with _lock:
+        embeddings = _embeddings.get(api_key)
+        if embeddings is None:
+            http_client, http_async_client = _http_clients()
+            embeddings = OpenAIEmbeddings(
+                api_key=api_key, http_client=http_client, http_async_client=http_async_client,
+            )
+            _embeddings[api_key] = embeddings
+        return embeddings
+
+
+def close_clients():
+    global _http_client, _http_async_client
+    with _lock:
+        _chat_models.clear()
+        _logger_chat_models.clear()
+        _embeddings.clear()
+        http_client, _http_client, _http_async_client = _http_client, None, None
+    # I pool async vanno chiusi dal loro event loop; a fine processo basta quello sync
+    if http_client is not None:
+        http_client.close()
+
+
+atexit.register(close_clients)
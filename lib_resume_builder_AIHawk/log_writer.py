@@ -0,0 +1,134 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+from lib_resume_builder_AIHawk.config import global_config
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class JSONLWriter:
+
+    def __init__(self, path: Path, max_bytes: Optional[int] = None, rotate_interval: Optional[float] = None,
+                 flush_interval: float = 1.0, batch_size: int = 100):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._file = None
+        self._opened_at = None
+        self._thread = threading.Thread(target=self._run, name=f"jsonl-writer-{self.path.name}", daemon=True)
+        self._thread.start()
+
+    def write(self, entry: Dict):
+        # Non blocca il chiamante: la serializzazione e l'I/O avvengono nel thread del writer
+        self._queue.put(entry)
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._opened_at = time.monotonic()
+
+    def _rotate_if_needed(self):
+        too_big = self.max_bytes is not None and self._file.tell() >= self.max_bytes
+        too_old = self.rotate_interval is not None and time.monotonic() - self._opened_at >= self.rotate_interval
+        if not (too_big or too_old) or self._file.tell() == 0:
+            return
+        self._file.close()
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        rotated = self.path.with_name(f"{self.path.stem}.{timestamp}{self.path.suffix}")
+        counter = 1
+        while rotated.exists():
+            rotated = self.path.with_name(f"{self.path.stem}.{timestamp}-{counter}{self.path.suffix}")
+            counter += 1
+        os.replace(self.path, rotated)
+        self._open()
+
+    def _write_batch(self, batch):
+        if self._file is None:
+            self._open()
+        lines = []
+        for entry in batch:
+            try:
+                lines.append(json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str))
+            except (TypeError, ValueError) as e:
+                logger.error(f"Could not serialize log entry: {e}")
+        if lines:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+        self._rotate_if_needed()
+
+    def _next_batch(self):
+        # Dalla prima voce si continua a raccogliere per flush_interval secondi o fino a batch_size
+        # voci: un solo write e un solo flush per batch anche con poche chiamate al secondo.
+        # Restituisce (voci, True se è arrivata la richiesta di chiusura)
+        item = self._queue.get()
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while item is not _STOP:
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                return batch, False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, False
+        return batch, True
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except OSError as e:
+                    logger.error(f"Could not write to {self.path}: {e}")
+        if self._file is not None:
+            self._file.close()
+
+    def close(self, timeout: Optional[float] = 10):
+        # Le voci già in coda vengono scritte prima della chiusura
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+
+_writers: Dict[Path, JSONLWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_log_writer(path: Path) -> JSONLWriter:
+    path = Path(path)
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = JSONLWriter(
+                path,
+                max_bytes=global_config.LLM_LOG_MAX_BYTES,
+                rotate_interval=global_config.LLM_LOG_ROTATE_INTERVAL,
+                flush_interval=global_config.LLM_LOG_FLUSH_INTERVAL,
+            )
+            _writers[path] = writer
+        return writer
+
+
+def close_log_writers():
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+
+atexit.register(close_log_writers)
@@ -1,14 +1,18 @@
-import base64
-import os
+import os  # unit-test/pdf_generation.py sostituisce manager_facade.os.system
+from contextlib import contextmanager
 from pathlib import Path
-import tempfile
 import inquirer
 from lib_resume_builder_AIHawk.config import global_config
-from lib_resume_builder_AIHawk.utils import HTML_to_PDF
+from lib_resume_builder_AIHawk.browser_pool import get_browser_pool
+from lib_resume_builder_AIHawk.disk_cache import get_pdf_cache
+from lib_resume_builder_AIHawk.hedging import get_hedge_policy
+from lib_resume_builder_AIHawk.section_executor import get_section_executor, tenant_scope
+from lib_resume_builder_AIHawk.usage import track_usage
+from lib_resume_builder_AIHawk.utils import HTML_string_to_PDF, HTML_string_to_PDF_bytes, HTML_string_to_PDF_file, HTML_strings_to_PDF_bytes
 import webbrowser
 
 class FacadeManager:
-    def __init__(self, api_key, style_manager, resume_generator, resume_object, log_path):
+    def __init__(self, api_key, style_manager, resume_generator, resume_object, log_path, browser_pool=None, pdf_cache=None):
         # Ottieni il percorso assoluto della directory della libreria
         lib_directory = Path(__file__).resolve().parent
         global_config.STRINGS_MODULE_RESUME_PATH = lib_directory / "resume_prompt/strings_feder-cr.py"
@@ -22,6 +26,11 @@ class FacadeManager:
         self.resume_generator = resume_generator
         self.resume_generator.set_resume_object(resume_object)
         self.selected_style = None  # Proprietà per memorizzare lo stile selezionato
+        self.browser_pool = browser_pool  # Se None si usa il pool condiviso del processo
+        self.pdf_cache = pdf_cache if pdf_cache is not None else get_pdf_cache()
+        self.usage_budget = {}
+        self.last_usage = None  # Report di token e costi dell'ultima generazione
+        self.tenant = None  # Le code dell'executor condiviso sono servite a turno per tenant
 
     def prompt_user(self, choices: list[str], message: str) -> str:
         questions = [
@@ -59,7 +68,28 @@ class FacadeManager:
             self.selected_style = selected_choice.split(' (')[0]
 
 
-    def pdf_base64(self, job_description_url=None, job_description_text=None):
+    def set_usage_budget(self, max_tokens=None, max_cost=None, on_exceeded="abort", downgrade_model=None):
+        # on_exceeded: "abort" interrompe la generazione con BudgetExceededError,
+        # "downgrade" passa le chiamate successive al modello di ripiego
+        self.usage_budget = {
+            "max_tokens": max_tokens,
+            "max_cost": max_cost,
+            "on_exceeded": on_exceeded,
+            "downgrade_model": downgrade_model,
+        }
+
+    def set_tenant(self, tenant):
+        self.tenant = tenant
+
+    @contextmanager
+    def _track_usage(self):
+        with tenant_scope(self.tenant), track_usage(**self.usage_budget) as tracker:
+            try:
+                yield tracker
+            finally:
+                self.last_usage = tracker.report()
+
+    def _create_html(self, job_description_url=None, job_description_text=None):
         if (job_description_url is not None and job_description_text is not None):
             raise ValueError("Esattamente uno tra 'job_description_url' o 'job_description_text' deve essere fornito.")
         
@@ -68,16 +98,97 @@ class FacadeManager:
         
         style_path = self.style_manager.get_style_path(self.selected_style)
 
-        with tempfile.NamedTemporaryFile(delete=False, mode='w', suffix='.html', encoding='utf-8') as temp_html_file:
-            temp_html_path = temp_html_file.name
-            if job_description_url is None and job_description_text is None:
-                self.resume_generator.create_resume(style_path, temp_html_path)
-            elif job_description_url is not None and job_description_text is None:
-                self.resume_generator.create_resume_job_description_url(style_path, job_description_url, temp_html_path)
-            elif job_description_url is None and job_description_text is not None:
-                self.resume_generator.create_resume_job_description_text(style_path, job_description_text, temp_html_path)
-            else:
-                return None
-        pdf_base64 = HTML_to_PDF(temp_html_path)
-        os.remove(temp_html_path)
-        return pdf_base64
+        with self._track_usage():
+            if job_description_url is not None:
+                return self.resume_generator.create_resume_job_description_url_html(style_path, job_description_url)
+            if job_description_text is not None:
+                return self.resume_generator.create_resume_job_description_text_html(style_path, job_description_text)
+            return self.resume_generator.create_resume_html(style_path)
+
+    def _render_kwargs(self):
+        # Il contenuto del CSS entra nella chiave della cache insieme all'HTML finale
+        style_path = self.style_manager.get_style_path(self.selected_style)
+        with open(style_path, 'rb') as style_file:
+            style_content = style_file.read()
+        return {
+            "pool": self.browser_pool or get_browser_pool(),
+            "cache": self.pdf_cache,
+            "cache_key_parts": (style_content,),
+        }
+
+    def pdf_base64(self, job_description_url=None, job_description_text=None):
+        html = self._create_html(job_description_url, job_description_text)
+        return HTML_string_to_PDF(html, **self._render_kwargs())
+
+    def pdf_base64_with_usage(self, job_description_url=None, job_description_text=None):
+        pdf = self.pdf_base64(job_description_url, job_description_text)
+        return pdf, self.last_usage
+
+    def pdf_bytes(self, job_description_url=None, job_description_text=None) -> bytes:
+        html = self._create_html(job_description_url, job_description_text)
+        return HTML_string_to_PDF_bytes(html, **self._render_kwargs())
+
+    def pdf_to_file(self, destination, job_description_url=None, job_description_text=None) -> int:
+        # Scrive il PDF a blocchi su un percorso o su un buffer binario, restituisce i byte scritti
+        html = self._create_html(job_description_url, job_description_text)
+        return HTML_string_to_PDF_file(html, destination, **self._render_kwargs())
+
+    def pdf_bytes_for_styles(self, styles=None, job_description_url=None, job_description_text=None):
+        # Le sezioni vengono generate una sola volta e renderizzate con ogni stile richiesto
+        if job_description_url is not None and job_description_text is not None:
+            raise ValueError("Esattamente uno tra 'job_description_url' o 'job_description_text' deve essere fornito.")
+        available_styles = self.style_manager.get_styles()
+        styles = list(styles) if styles is not None else list(available_styles)
+        unknown_styles = [style for style in styles if style not in available_styles]
+        if unknown_styles:
+            raise ValueError(f"Unknown styles: {', '.join(unknown_styles)}")
+
+        with self._track_usage():
+            body = self.resume_generator.create_resume_body(job_description_url, job_description_text)
+        htmls = {}
+        cache_key_parts = {}
+        for style in styles:
+            style_path = self.style_manager.get_style_path(style)
+            htmls[style] = self.resume_generator.build_html(body, style_path)
+            with open(style_path, 'rb') as style_file:
+                cache_key_parts[style] = (style_file.read(),)
+        return HTML_strings_to_PDF_bytes(
+            htmls,
+            pool=self.browser_pool or get_browser_pool(),
+            cache=self.pdf_cache,
+            cache_key_parts=cache_key_parts,
+        )
+
+    def pdf_bytes_for_job_descriptions(self, job_description_texts, max_concurrency=None):
+        # Un PDF per job description, nello stesso ordine; None dove la generazione è fallita
+        if self.selected_style is None:
+            raise ValueError("Devi scegliere uno stile prima di generare il PDF.")
+        style_path = self.style_manager.get_style_path(self.selected_style)
+        with self._track_usage():
+            pages = self.resume_generator.create_resume_html_for_job_descriptions(
+                style_path, job_description_texts, max_concurrency=max_concurrency
+            )
+        htmls = {index: html for index, html in enumerate(pages) if html is not None}
+        render_kwargs = self._render_kwargs()
+        pdfs = HTML_strings_to_PDF_bytes(
+            htmls,
+            pool=render_kwargs["pool"],
+            cache=render_kwargs["cache"],
+            cache_key_parts={index: render_kwargs["cache_key_parts"] for index in htmls},
+        )
+        return [pdfs.get(index) for index in range(len(pages))]
+
+    def section_report(self):
+        # Quali sezioni dell'ultima generazione sono state riusate e quali rigenerate
+        return dict(self.resume_generator.last_section_report)
+
+    def section_executor_stats(self):
+        # Profondità delle code e tempi di attesa, per dimensionare SECTION_EXECUTOR_MAX_IN_FLIGHT
+        return get_section_executor().stats()
+
+    def hedge_stats(self):
+        policy = get_hedge_policy()
+        return policy.stats() if policy is not None else {}
+
+    def pdf_cache_stats(self):
+        return self.pdf_cache.stats() if self.pdf_cache is not None else {}
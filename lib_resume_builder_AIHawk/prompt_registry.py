@@ -0,0 +1,50 @@
+import textwrap
+import threading
+from typing import Dict, Tuple
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+
+def prompt_pack(strings) -> str:
+    # I due moduli strings vengono caricati con lo stesso nome, il file li distingue
+    return getattr(strings, "__file__", None) or strings.__name__
+
+
+class PromptRegistry:
+
+    def __init__(self):
+        self._prompts: Dict[Tuple[str, str], Tuple[str, ChatPromptTemplate]] = {}
+        self._lock = threading.Lock()
+
+    def prompt(self, pack: str, section: str, template: str) -> ChatPromptTemplate:
+        # Il testo del template fa parte della voce: se il modulo viene ricaricato con un
+        # prompt diverso, la sezione viene ricompilata
+        key = (pack, section)
+        entry = self._prompts.get(key)
+        if entry is None or entry[0] != template:
+            compiled = ChatPromptTemplate.from_template(textwrap.dedent(template))
+            with self._lock:
+                self._prompts[key] = (template, compiled)
+            return compiled
+        return entry[1]
+
+    def chain(self, pack: str, section: str, template: str, llm):
+        # Le chain dipendono dal modello, quindi vengono conservate sul LoggerChatModel
+        key = (pack, section)
+        entry = llm.chain_cache.get(key)
+        if entry is None or entry[0] != template:
+            chain = self.prompt(pack, section, template) | llm.as_runnable() | StrOutputParser()
+            llm.chain_cache[key] = (template, chain)
+            return chain
+        return entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._prompts.clear()
+
+
+_prompt_registry = PromptRegistry()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    return _prompt_registry
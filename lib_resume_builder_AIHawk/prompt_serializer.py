@@ -0,0 +1,91 @@
+import re
+from dataclasses import asdict, is_dataclass
+from typing import Any, Dict, List
+from pydantic import BaseModel
+
+# Chiavi numerate come responsibility_1, responsibility_2: il numero non aggiunge informazione
+_ENUMERATED_KEY_RE = re.compile(r"_?\d+$")
+_INLINE_MAX_CHARS = 60
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or (isinstance(value, (list, tuple, set, dict)) and not value)
+
+
+def to_prompt_data(value: Any) -> Any:
+    # Solo tipi JSON: niente nomi di classe, campi None o di default, wrapper HttpUrl(...)
+    if isinstance(value, BaseModel):
+        value = value.model_dump(mode="json", exclude_none=True, exclude_defaults=True)
+    elif is_dataclass(value) and not isinstance(value, type):
+        value = asdict(value)
+    if isinstance(value, dict):
+        return {str(key): to_prompt_data(item) for key, item in value.items() if not _is_empty(item)}
+    if isinstance(value, (list, tuple)):
+        return [to_prompt_data(item) for item in value if not _is_empty(item)]
+    if isinstance(value, (set, frozenset)):
+        # L'ordine di un set cambia tra un processo e l'altro, ordinato il prompt resta stabile
+        return sorted((to_prompt_data(item) for item in value), key=str)
+    return value
+
+
+def _fits_on_one_line(texts: List[str]) -> bool:
+    # Elenchi brevi separati da virgole; frasi lunghe o con virgole separate da punto e virgola
+    return all(len(text) <= _INLINE_MAX_CHARS and "," not in text for text in texts)
+
+
+def _unwrap_enumerated(items: List[Any]) -> List[Any]:
+    # [{"responsibility_1": a}, {"responsibility_2": b}] diventa [a, b]; chiavi diverse
+    # (es. gli esami con il voto) restano
+    if not items or not all(isinstance(item, dict) and len(item) == 1 for item in items):
+        return items
+    names = {_ENUMERATED_KEY_RE.sub("", next(iter(item))) for item in items}
+    if len(names) != 1:
+        return items
+    return [next(iter(item.values())) for item in items]
+
+
+def _cell(value: Any) -> str:
+    # Un valore su una sola riga, senza "|" che separa le colonne delle tabelle
+    if isinstance(value, dict):
+        return "; ".join(f"{key}: {_cell(item)}" for key, item in value.items())
+    if isinstance(value, list):
+        texts = [_cell(item) for item in _unwrap_enumerated(value)]
+        return (", " if _fits_on_one_line(texts) else "; ").join(texts)
+    return " ".join(str(value).split()).replace("|", "/")
+
+
+def _table(records: List[Dict[str, Any]]) -> List[str]:
+    # Elenco di record: i nomi dei campi compaiono una volta nell'intestazione e non in ogni record
+    columns = []
+    for record in records:
+        columns.extend(key for key in record if key not in columns)
+    rows = [" | ".join(_cell(record.get(column, "")) for column in columns) for record in records]
+    return [" | ".join(columns)] + rows
+
+
+def serialize_for_prompt(value: Any) -> str:
+    # Testo senza virgolette né parentesi: "chiave: valore" per un oggetto, una tabella con "|"
+    # per un elenco di oggetti, valori separati da virgole per un elenco semplice
+    if isinstance(value, str):
+        return value
+    if _is_empty(value):
+        return ""
+    data = to_prompt_data(value)
+    if isinstance(data, dict):
+        return "\n".join(f"{key}: {_cell(item)}" for key, item in data.items())
+    if isinstance(data, list):
+        data = _unwrap_enumerated(data)
+        if all(isinstance(item, dict) for item in data):
+            return "\n".join(_table(data))
+        texts = [_cell(item) for item in data]
+        return ", ".join(texts) if _fits_on_one_line(texts) else "\n".join(texts)
+    return _cell(data)
+
+
+def serialize_inputs(inputs: Dict[str, Any], mode: str = "compact") -> Dict[str, Any]:
+    # mode="repr" lascia gli oggetti come sono: il template usa il loro repr, come in origine
+    if mode == "repr":
+        return inputs
+    if mode != "compact":
+        raise ValueError("mode must be 'compact' or 'repr'")
+    return {key: serialize_for_prompt(value) for key, value in inputs.items()}
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+from typing import Mapping, Optional
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.deadlines import ensure_time_for
+
+logger = logging.getLogger(__name__)
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_reset_duration(value: str) -> Optional[float]:
+    # Formato usato dagli header x-ratelimit-reset-*: "20ms", "1s", "6m0s", "1h2m3.5s"
+    matches = _DURATION_RE.findall(value or "")
+    if not matches:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in matches)
+
+
+def estimate_tokens(text: str) -> int:
+    # Stima grossolana ma stabile: circa 4 caratteri per token nei testi inglesi
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / 60
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        # Una richiesta più grande della capacità passa quando il bucket è pieno
+        needed = min(amount, self.capacity) - self.level
+        return max(0.0, needed / self.rate) if self.rate > 0 else 1.0
+
+
+class LLMRateLimiter:
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, estimated_tokens: int) -> float:
+        # Restituisce 0 se il permesso è stato concesso, altrimenti quanto attendere
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+            if wait > 0:
+                return wait
+            self.requests.level -= 1
+            self.tokens.level -= estimated_tokens
+            return 0.0
+
+    def acquire(self, estimated_tokens: int) -> float:
+        start = time.monotonic()
+        while True:
+            wait = self._try_acquire(estimated_tokens)
+            if wait <= 0:
+                waited = time.monotonic() - start
+                if waited > 0.5:
+                    logger.info(f"Rate limiter delayed request by {waited:.2f}s")
+                return waited
+            # Un'attesa oltre la scadenza della sezione fallisce subito (DeadlineExceededError)
+            ensure_time_for(wait)
+            time.sleep(min(wait, 1.0))
+
+    async def aacquire(self, estimated_tokens: int) -> float:
+        start = time.monotonic()
+        while True:
+            wait = self._try_acquire(estimated_tokens)
+            if wait <= 0:
+                return time.monotonic() - start
+            ensure_time_for(wait)
+            await asyncio.sleep(min(wait, 1.0))
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int):
+        # Corregge il bucket con i token effettivamente consumati
+        if not actual_tokens:
+            return
+        with self._lock:
+            self.tokens.level -= actual_tokens - estimated_tokens
+
+    def pause(self, seconds: float):
+        # Dopo un 429 tutte le richieste del processo attendono, non solo quella fallita
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]):
+        if not headers:
+            return
+        headers = {key.lower(): value for key, value in headers.items()}
+        with self._lock:
+            now = time.monotonic()
+            for name, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+                limit = headers.get(f"x-ratelimit-limit-{name}")
+                remaining = headers.get(f"x-ratelimit-remaining-{name}")
+                try:
+                    if limit is not None:
+                        bucket.refill(now)
+                        bucket.capacity = float(limit)
+                    if remaining is not None:
+                        bucket.refill(now)
+                        bucket.level = min(bucket.level, float(remaining))
+                except ValueError:
+                    continue
+                if remaining is not None and float(remaining) <= 0:
+                    reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{name}"))
+                    if reset:
+                        self.paused_until = max(self.paused_until, now + reset)
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> LLMRateLimiter:
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = LLMRateLimiter(
+                requests_per_minute=global_config.LLM_REQUESTS_PER_MINUTE,
+                tokens_per_minute=global_config.LLM_TOKENS_PER_MINUTE,
+            )
+        return _rate_limiter
@@ -0,0 +1,80 @@
+import logging
+import time
+from typing import Optional
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+logger = logging.getLogger(__name__)
+
+# Attende in ordine: evento load, document.fonts.ready, il selettore richiesto e infine
+# un periodo senza nuove risorse completate (network idle). Un timer interno garantisce
+# che lo script risponda sempre entro il timeout.
+_READY_SCRIPT = """
+const selector = arguments[0];
+const idleMs = arguments[1];
+const timeoutMs = arguments[2];
+const done = arguments[arguments.length - 1];
+const start = performance.now();
+
+function whenLoaded() {
+    if (document.readyState === 'complete') return Promise.resolve();
+    return new Promise(resolve => window.addEventListener('load', resolve, {once: true}));
+}
+function whenFonts() {
+    return document.fonts ? document.fonts.ready : Promise.resolve();
+}
+function whenSelector() {
+    if (!selector || document.querySelector(selector)) return Promise.resolve();
+    return new Promise(resolve => {
+        const observer = new MutationObserver(() => {
+            if (document.querySelector(selector)) {
+                observer.disconnect();
+                resolve();
+            }
+        });
+        observer.observe(document.documentElement, {childList: true, subtree: true});
+    });
+}
+function whenNetworkIdle() {
+    if (!idleMs) return Promise.resolve();
+    return new Promise(resolve => {
+        let seen = performance.getEntriesByType('resource').length;
+        let lastChange = performance.now();
+        const tick = () => {
+            const count = performance.getEntriesByType('resource').length;
+            const now = performance.now();
+            if (count !== seen) {
+                seen = count;
+                lastChange = now;
+            }
+            if (now - lastChange >= idleMs) resolve();
+            else setTimeout(tick, 50);
+        };
+        tick();
+    });
+}
+
+const ready = whenLoaded().then(whenFonts).then(whenSelector).then(whenNetworkIdle).then(() => true);
+const timer = new Promise(resolve => setTimeout(() => resolve(false), timeoutMs));
+Promise.race([ready, timer]).then(ok => done({ready: ok, elapsed: performance.now() - start}));
+"""
+
+
+def wait_until_ready(driver, timeout: float = 10, selector: Optional[str] = None,
+                     network_idle_ms: int = 0) -> float:
+    # Restituisce i secondi effettivamente attesi, al massimo `timeout`
+    start = time.monotonic()
+    ready = False
+    try:
+        driver.set_script_timeout(timeout + 1)
+        result = driver.execute_async_script(_READY_SCRIPT, selector, network_idle_ms, int(timeout * 1000))
+        ready = bool(result and result.get("ready"))
+    except TimeoutException:
+        pass
+    except WebDriverException as e:
+        logger.warning(f"Readiness check failed, continuing anyway: {e}")
+    elapsed = time.monotonic() - start
+    if ready:
+        logger.info(f"Page ready after {elapsed:.3f}s")
+    else:
+        logger.warning(f"Page not ready after {elapsed:.3f}s (timeout {timeout}s), continuing anyway")
+    return elapsed
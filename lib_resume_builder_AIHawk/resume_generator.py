@@ -1,38 +1,191 @@
-from typing import Any
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
 from string import Template
-from typing import Any
 from lib_resume_builder_AIHawk.gpt_resume import LLMResumer
 from lib_resume_builder_AIHawk.gpt_resume_job_description import LLMResumeJobDescription
 from lib_resume_builder_AIHawk.module_loader import load_module
 from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.asset_bundle import get_asset_bundle
+from lib_resume_builder_AIHawk.batch_backend import run_bulk
+
+logger = logging.getLogger(__name__)
 
 class ResumeGenerator:
     def __init__(self):
-        pass
+        # Sezioni riusate o rigenerate nell'ultima generazione, vedi LLMResumer.section_report
+        self.last_section_report = {}
     
     def set_resume_object(self, resume_object):
          self.resume_object = resume_object
 
-    def _create_resume(self, gpt_answerer: Any, style_path, temp_html_path):
-        gpt_answerer.set_resume(self.resume_object)
+    @staticmethod
+    def _style_tag(style_path) -> str:
+        # Il CSS viene incluso nella pagina, così l'HTML non dipende dal percorso su disco
+        with open(style_path, 'r', encoding='utf-8') as style_file:
+            return f"<style>\n{style_file.read()}\n</style>"
+
+    def _page_shell(self, style_path):
+        # Font e CSS remoti vengono sostituiti con le copie locali del bundle solo nel template e nello
+        # stile: il corpo generato dall'LLM (anche da una job description esterna) non viene mai
+        # esaminato, così un <link> o un @import nel testo non provoca download né finisce incorporato
+        marker = "<!--resume-body-->"
         template = Template(global_config.html_template)
-        message = template.substitute(markdown=gpt_answerer.generate_html_resume(), style_path=style_path)
-        with open(temp_html_path, 'w', encoding='utf-8') as temp_file:
-            temp_file.write(message)
+        shell = template.substitute(
+            markdown=marker,
+            style=self._style_tag(style_path),
+            style_path=style_path,
+        )
+        head, tail = get_asset_bundle().inline_assets(shell).split(marker, 1)
+        return head, tail
 
-    def create_resume(self, style_path, temp_html_file):
+    def build_html(self, body: str, style_path) -> str:
+        head, tail = self._page_shell(style_path)
+        return head + body + tail
+
+    def iter_resume_html(self, style_path, url_job_description: str = None, job_description_text: str = None):
+        # Pagina completa a frammenti: intestazione HTML subito, poi le sezioni appena pronte
+        head, tail = self._page_shell(style_path)
+        gpt_answerer = self._create_answerer(url_job_description, job_description_text)
+        gpt_answerer.set_resume(self.resume_object)
+        yield head
+        yield from gpt_answerer.iter_html_resume()
+        self.last_section_report = gpt_answerer.section_report
+        yield tail
+
+    def _new_answerer(self, with_job_description: bool) -> Any:
+        if not with_job_description:
+            strings = load_module(global_config.STRINGS_MODULE_RESUME_PATH, global_config.STRINGS_MODULE_NAME)
+            return LLMResumer(global_config.API_KEY, strings)
+        strings = load_module(global_config.STRINGS_MODULE_RESUME_JOB_DESCRIPTION_PATH, global_config.STRINGS_MODULE_NAME)
+        return LLMResumeJobDescription(global_config.API_KEY, strings)
+
+    def _create_answerer(self, url_job_description: str = None, job_description_text: str = None) -> Any:
+        gpt_answerer = self._new_answerer(url_job_description is not None or job_description_text is not None)
+        if url_job_description is not None:
+            gpt_answerer.set_job_description_from_url(url_job_description)
+        elif job_description_text is not None:
+            gpt_answerer.set_job_description_from_text(job_description_text)
+        return gpt_answerer
+
+    def create_resume_body(self, url_job_description: str = None, job_description_text: str = None) -> str:
+        # Solo le sezioni generate dall'LLM, da combinare con uno o più stili tramite build_html
+        gpt_answerer = self._create_answerer(url_job_description, job_description_text)
+        gpt_answerer.set_resume(self.resume_object)
+        body = gpt_answerer.generate_html_resume()
+        self.last_section_report = gpt_answerer.section_report
+        return body
+
+    async def acreate_resume_body(self, url_job_description: str = None, job_description_text: str = None) -> str:
+        gpt_answerer = self._new_answerer(url_job_description is not None or job_description_text is not None)
+        if url_job_description is not None:
+            # Lo scraping con Selenium è bloccante, quindi gira in un thread separato
+            await asyncio.to_thread(gpt_answerer.set_job_description_from_url, url_job_description)
+        elif job_description_text is not None:
+            await gpt_answerer.aset_job_description_from_text(job_description_text)
+        gpt_answerer.set_resume(self.resume_object)
+        body = await gpt_answerer.agenerate_html_resume()
+        self.last_section_report = gpt_answerer.section_report
+        return body
+
+    async def acreate_resume_bodies_for_job_descriptions(self, job_description_texts: List[str], resume=None,
+                                                          max_concurrency: int = None) -> List[Optional[str]]:
+        # Un body per job description, nello stesso ordine; None per quelle non riuscite.
+        # I riassunti girano in parallelo, le sezioni che non usano la job description vengono
+        # generate una sola volta e le altre sotto un unico limite di concorrenza
+        resume = resume or self.resume_object
+        semaphore = asyncio.Semaphore(max_concurrency or global_config.BATCH_MAX_CONCURRENCY)
+        strings = load_module(global_config.STRINGS_MODULE_RESUME_JOB_DESCRIPTION_PATH, global_config.STRINGS_MODULE_NAME)
+        answerers = []
+        for _ in job_description_texts:
+            gpt_answerer = LLMResumeJobDescription(global_config.API_KEY, strings)
+            gpt_answerer.set_resume(resume)
+            answerers.append(gpt_answerer)
+
+        async def summarize(gpt_answerer, job_description_text):
+            async with semaphore:
+                await gpt_answerer.aset_job_description_from_text(job_description_text)
+
+        summaries = await asyncio.gather(
+            *(summarize(gpt_answerer, text) for gpt_answerer, text in zip(answerers, job_description_texts)),
+            return_exceptions=True,
+        )
+        ready = []
+        for index, (gpt_answerer, summary) in enumerate(zip(answerers, summaries)):
+            if isinstance(summary, BaseException):
+                logger.error(f"Job description {index} could not be summarized: {summary}")
+            else:
+                ready.append(gpt_answerer)
+        if not ready:
+            return [None] * len(answerers)
+
+        template_answerer = ready[0]
+        shared_sections = [
+            section for section in template_answerer._sections_to_generate()
+            if not template_answerer.uses_job_description(section)
+        ]
+        shared_outputs = await asyncio.gather(
+            *(template_answerer._agenerate_limited(section, semaphore) for section in shared_sections),
+            return_exceptions=True,
+        )
+        shared = {}
+        for section, output in zip(shared_sections, shared_outputs):
+            if isinstance(output, BaseException):
+                logger.error(f"{section} generated an exception: {output}")
+            elif output:
+                shared[section] = output
+
+        bodies = await asyncio.gather(
+            *(gpt_answerer.agenerate_html_resume(precomputed=shared, semaphore=semaphore) for gpt_answerer in ready),
+            return_exceptions=True,
+        )
+        results = dict(zip(map(id, ready), bodies))
+        outputs = []
+        for index, gpt_answerer in enumerate(answerers):
+            body = results.get(id(gpt_answerer))
+            if isinstance(body, BaseException):
+                logger.error(f"Resume for job description {index} failed: {body}")
+                body = None
+            outputs.append(body)
+        return outputs
+
+    def create_resume_bodies_for_job_descriptions(self, job_description_texts: List[str], resume=None,
+                                                  max_concurrency: int = None) -> List[Optional[str]]:
+        return asyncio.run(self.acreate_resume_bodies_for_job_descriptions(job_description_texts, resume, max_concurrency))
+
+    def create_resume_html_for_job_descriptions(self, style_path, job_description_texts: List[str], resume=None,
+                                                max_concurrency: int = None) -> List[Optional[str]]:
+        bodies = self.create_resume_bodies_for_job_descriptions(job_description_texts, resume, max_concurrency)
+        return [self.build_html(body, style_path) if body is not None else None for body in bodies]
+
+    def create_resume_bodies_bulk(self, resumes: Dict[str, Any], backend=None, work_directory=None,
+                                  poll_interval: float = None, timeout: float = None) -> Dict[str, str]:
+        # Rigenerazione offline di molti resume tramite un backend batch invece delle chiamate in tempo reale
         strings = load_module(global_config.STRINGS_MODULE_RESUME_PATH, global_config.STRINGS_MODULE_NAME)
-        gpt_answerer = LLMResumer(global_config.API_KEY, strings)
-        self._create_resume(gpt_answerer, style_path, temp_html_file)
+        answerers = {}
+        for resume_id, resume in resumes.items():
+            gpt_answerer = LLMResumer(global_config.API_KEY, strings)
+            gpt_answerer.set_resume(resume)
+            answerers[resume_id] = gpt_answerer
+        return run_bulk(answerers, backend, work_directory, poll_interval, timeout)
+
+    def create_resume_html(self, style_path) -> str:
+        return self.build_html(self.create_resume_body(), style_path)
+
+    def create_resume_job_description_url_html(self, style_path: str, url_job_description: str) -> str:
+        return self.build_html(self.create_resume_body(url_job_description=url_job_description), style_path)
+
+    def create_resume_job_description_text_html(self, style_path: str, job_description_text: str) -> str:
+        return self.build_html(self.create_resume_body(job_description_text=job_description_text), style_path)
+
+    def create_resume(self, style_path, temp_html_file):
+        with open(temp_html_file, 'w', encoding='utf-8') as temp_file:
+            temp_file.write(self.create_resume_html(style_path))
 
     def create_resume_job_description_url(self, style_path: str, url_job_description: str, temp_html_path):
-        strings = load_module(global_config.STRINGS_MODULE_RESUME_JOB_DESCRIPTION_PATH, global_config.STRINGS_MODULE_NAME)
-        gpt_answerer = LLMResumeJobDescription(global_config.API_KEY, strings)
-        gpt_answerer.set_job_description_from_url(url_job_description)
-        self._create_resume(gpt_answerer, style_path, temp_html_path)
+        with open(temp_html_path, 'w', encoding='utf-8') as temp_file:
+            temp_file.write(self.create_resume_job_description_url_html(style_path, url_job_description))
 
     def create_resume_job_description_text(self, style_path: str, job_description_text: str, temp_html_path):
-        strings = load_module(global_config.STRINGS_MODULE_RESUME_JOB_DESCRIPTION_PATH, global_config.STRINGS_MODULE_NAME)
-        gpt_answerer = LLMResumeJobDescription(global_config.API_KEY, strings)
-        gpt_answerer.set_job_description_from_text(job_description_text)
-        self._create_resume(gpt_answerer, style_path, temp_html_path)
+        with open(temp_html_path, 'w', encoding='utf-8') as temp_file:
+            temp_file.write(self.create_resume_job_description_text_html(style_path, job_description_text))
@@ -0,0 +1,144 @@
+import logging
+import random
+import re
+import threading
+import time
+from typing import Optional
+import openai
+from requests.exceptions import HTTPError as HTTPStatusError
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.rate_limiter import parse_reset_duration
+
+logger = logging.getLogger(__name__)
+
+# Errori del servizio, non della richiesta: sono quelli che fanno scattare il circuit breaker
+_UPSTREAM_FAILURES = (openai.APIConnectionError, openai.InternalServerError)
+# "Please try again in 20ms", "in 1.5s", "in 6m0s"
+_TRY_AGAIN_RE = re.compile(r"try again in ((?:\d+(?:\.\d+)?(?:ms|s|m|h))+)")
+
+
+class EmptyStreamError(Exception):
+    pass
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def _status_code(err: Exception):
+    if isinstance(err, openai.APIStatusError):
+        return err.status_code
+    if isinstance(err, HTTPStatusError) and err.response is not None:
+        return err.response.status_code
+    return None
+
+
+def is_rate_limit(err: Exception) -> bool:
+    return isinstance(err, openai.RateLimitError) or _status_code(err) == 429
+
+
+def is_retryable(err: Exception) -> bool:
+    # Solo errori di rete o del servizio; gli errori locali (TypeError, KeyError...) falliscono subito
+    if isinstance(err, (openai.APIConnectionError, EmptyStreamError)):
+        return True
+    status_code = _status_code(err)
+    return status_code is not None and (status_code in (408, 409, 429) or status_code >= 500)
+
+
+def retry_after(err: Exception) -> Optional[float]:
+    # Secondi di attesa indicati dal servizio: header retry-after-ms, retry-after, x-ratelimit-reset-*
+    # (del limite esaurito, se indicato), altrimenti il testo del messaggio
+    response = getattr(err, "response", None)
+    headers = {key.lower(): value for key, value in getattr(response, "headers", {}).items()}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1)):
+        try:
+            return float(headers[name]) * scale
+        except (KeyError, ValueError):
+            continue
+    resets = {}
+    for name in ("requests", "tokens"):
+        reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{name}"))
+        if reset is not None:
+            resets[name] = reset
+    exhausted = [reset for name, reset in resets.items() if headers.get(f"x-ratelimit-remaining-{name}") == "0"]
+    if exhausted or resets:
+        return max(exhausted or resets.values())
+    match = _TRY_AGAIN_RE.search(str(err))
+    return parse_reset_duration(match.group(1)) if match else None
+
+
+def is_upstream_failure(err: Exception) -> bool:
+    if isinstance(err, _UPSTREAM_FAILURES):
+        return True
+    status_code = _status_code(err)
+    return status_code is not None and status_code >= 500
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    # Full jitter: le richieste fallite insieme non riprovano tutte nello stesso istante
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    # closed: tutto passa; open: richieste rifiutate subito fino a reset_timeout;
+    # half_open: passa una sola richiesta di prova, che decide se richiudere o riaprire
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        # True se la chiamata è la prova del circuito half_open: chi la ottiene deve sempre
+        # concluderla con record_success, record_failure o release_probe
+        with self._lock:
+            if self.state == "closed":
+                return False
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            raise CircuitOpenError(f"LLM circuit is {self.state} after {self.failures} consecutive upstream failures")
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info("LLM circuit closed")
+            self.state = "closed"
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"LLM circuit opened after {self.failures} consecutive upstream failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        # La prova si è conclusa senza dire nulla sul servizio (es. errore della richiesta)
+        with self._lock:
+            self._probe_in_flight = False
+
+
+_circuit_breaker = None
+_circuit_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    global _circuit_breaker
+    with _circuit_breaker_lock:
+        if _circuit_breaker is None:
+            _circuit_breaker = CircuitBreaker(
+                failure_threshold=global_config.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=global_config.LLM_CIRCUIT_RESET_TIMEOUT,
+            )
+        return _circuit_breaker
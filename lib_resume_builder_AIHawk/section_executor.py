@@ -0,0 +1,170 @@
+import asyncio
+import atexit
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Dict, Optional
+from lib_resume_builder_AIHawk.config import global_config
+
+_current_tenant = contextvars.ContextVar("llm_tenant", default="default")
+
+
+def current_tenant() -> str:
+    return _current_tenant.get()
+
+
+@contextmanager
+def tenant_scope(tenant: Optional[str]):
+    token = _current_tenant.set(tenant or "default")
+    try:
+        yield
+    finally:
+        _current_tenant.reset(token)
+
+
+class SectionExecutor:
+    # Un solo executor per processo: al massimo max_in_flight sezioni in esecuzione, le altre
+    # restano in coda per tenant e vengono servite a turno, così un tenant con molti resume
+    # non blocca gli altri
+
+    def __init__(self, max_in_flight: int, wait_samples: int = 1000):
+        self.max_in_flight = max_in_flight
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="section")
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waits = deque(maxlen=wait_samples)
+        self.submitted = 0
+        self.completed = 0
+
+    def submit(self, fn: Callable, *args, tenant: Optional[str] = None) -> Future:
+        # Il task gira in una copia del contesto del chiamante (usage tracker, sezione, tenant)
+        tenant = tenant or current_tenant()
+        future = Future()
+        item = (future, contextvars.copy_context(), fn, args, time.monotonic())
+        with self._lock:
+            self._queues.setdefault(tenant, deque()).append(item)
+            self.submitted += 1
+        self._dispatch()
+        return future
+
+    @asynccontextmanager
+    async def slot(self, tenant: Optional[str] = None):
+        # Per le sezioni asyncio: occupano un posto tra i max_in_flight e aspettano il turno nella
+        # stessa coda per tenant delle sezioni in thread, ma il lavoro resta sull'event loop
+        tenant = tenant or current_tenant()
+        granted = Future()
+        with self._lock:
+            self._queues.setdefault(tenant, deque()).append((granted, None, None, None, time.monotonic()))
+            self.submitted += 1
+        self._dispatch()
+        try:
+            await asyncio.wrap_future(granted)
+        except asyncio.CancelledError:
+            # cancel() fallisce solo se il posto era già stato assegnato: va restituito
+            if not granted.cancel():
+                self._release()
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _next_item(self):
+        # Round robin: il tenant servito passa in fondo all'ordine
+        for tenant in list(self._queues):
+            queue = self._queues.pop(tenant)
+            item = queue.popleft()
+            if queue:
+                self._queues[tenant] = queue
+            return item
+        return None
+
+    def _dispatch(self):
+        granted = []
+        with self._lock:
+            while self._in_flight < self.max_in_flight:
+                item = self._next_item()
+                if item is None:
+                    break
+                future = item[0]
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._in_flight += 1
+                self._waits.append(time.monotonic() - item[4])
+                if item[2] is None:
+                    granted.append(future)
+                else:
+                    self._pool.submit(self._run, item)
+        # Posti assegnati alle sezioni asyncio, segnalati fuori dal lock
+        for future in granted:
+            future.set_result(None)
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+        self._dispatch()
+
+    def _run(self, item):
+        future, context, fn, args, _ = item
+        try:
+            future.set_result(context.run(fn, *args))
+        except BaseException as exc:
+            future.set_exception(exc)
+        finally:
+            self._release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            queued = {tenant: len(queue) for tenant, queue in self._queues.items()}
+            in_flight = self._in_flight
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": in_flight,
+            "queue_depth": sum(queued.values()),
+            "queue_depth_by_tenant": queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "wait_seconds": {
+                "mean": sum(waits) / len(waits) if waits else 0.0,
+                "p50": waits[len(waits) // 2] if waits else 0.0,
+                "p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+                "max": waits[-1] if waits else 0.0,
+            },
+        }
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pending = [item for queue in self._queues.values() for item in queue]
+            self._queues.clear()
+        for item in pending:
+            item[0].cancel()
+        self._pool.shutdown(wait=wait)
+
+
+_section_executor = None
+_section_executor_lock = threading.Lock()
+
+
+def get_section_executor() -> SectionExecutor:
+    global _section_executor
+    with _section_executor_lock:
+        if _section_executor is None:
+            _section_executor = SectionExecutor(global_config.SECTION_EXECUTOR_MAX_IN_FLIGHT)
+        return _section_executor
+
+
+def shutdown_section_executor():
+    global _section_executor
+    with _section_executor_lock:
+        executor, _section_executor = _section_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+atexit.register(shutdown_section_executor)
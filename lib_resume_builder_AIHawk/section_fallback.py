@@ -0,0 +1,32 @@
+import html
+from typing import Any, Dict, List
+from lib_resume_builder_AIHawk.prompt_serializer import to_prompt_data
+
+
+def _describe(value: Any) -> str:
+    if isinstance(value, dict):
+        return ", ".join(filter(None, (_describe(item) for item in value.values())))
+    if isinstance(value, list):
+        return ", ".join(filter(None, (_describe(item) for item in value)))
+    return str(value)
+
+
+def _items(inputs: Dict[str, Any]) -> List[str]:
+    items = []
+    for name, value in inputs.items():
+        if name == "job_description" or value is None:
+            continue
+        value = to_prompt_data(value)
+        for item in (value if isinstance(value, list) else [value]):
+            text = _describe(item)
+            if text:
+                items.append(text)
+    return items
+
+
+def deterministic_section_html(section: str, inputs: Dict[str, Any]) -> str:
+    # Versione senza LLM di una sezione: i dati del resume in una lista semplice,
+    # marcata con class="degraded" così si riconosce anche nel documento finale
+    items = "".join(f"\n    <li>{html.escape(item)}</li>" for item in _items(inputs))
+    title = html.escape(section.replace("_", " ").title())
+    return f'<section id="{section}" class="degraded">\n  <h2>{title}</h2>\n  <ul>{items}\n  </ul>\n</section>'
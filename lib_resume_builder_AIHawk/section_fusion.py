@@ -0,0 +1,45 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Più sezioni piccole in una sola richiesta: ogni sezione mantiene il suo prompt, il riassunto
+# della job description viene inviato una volta sola e la risposta è divisa da marcatori
+
+JOB_DESCRIPTION_REFERENCE = "(see the JOB DESCRIPTION at the top of this request)"
+
+_SECTION_RE = re.compile(r"<<<SECTION (\w+)>>>\s*(.*?)\s*<<<END \1>>>", re.DOTALL)
+_REQUESTED_RE = re.compile(r"<<<SECTION (\w+)>>>")
+
+
+def fused_prompt(tasks: List[Tuple[str, str]], job_description: Optional[str] = None) -> str:
+    # tasks: (sezione, prompt già compilato con i suoi input)
+    parts = [
+        "You will write several independent sections of the same resume. Complete every task below, "
+        "following its own instructions, as if each were a separate request.",
+    ]
+    if job_description:
+        parts.append(f"JOB DESCRIPTION (shared by all tasks):\n{job_description}")
+    for section, prompt in tasks:
+        parts.append(f"### TASK {section}\n{prompt.strip()}")
+    markers = "\n".join(f"<<<SECTION {section}>>>\n...\n<<<END {section}>>>" for section, _ in tasks)
+    parts.append(
+        "Return each section's HTML between its own markers, in this order and with nothing outside them:\n"
+        + markers
+    )
+    return "\n\n".join(parts)
+
+
+def requested_sections(prompt: str) -> List[str]:
+    sections = []
+    for section in _REQUESTED_RE.findall(prompt):
+        if section not in sections:
+            sections.append(section)
+    return sections
+
+
+def split_fused_reply(reply: str, sections: List[str]) -> Dict[str, str]:
+    # Solo le sezioni richieste e non vuote; quelle mancanti vengono rigenerate singolarmente
+    fragments = {}
+    for section, html in _SECTION_RE.findall(reply):
+        if section in sections and html and section not in fragments:
+            fragments[section] = html
+    return fragments
@@ -0,0 +1,51 @@
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.disk_cache import DiskCache
+from lib_resume_builder_AIHawk.prompt_serializer import serialize_inputs
+
+
+class SectionStore:
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.store = DiskCache(directory, max_bytes=max_bytes)
+
+    @staticmethod
+    def make_key(section: str, inputs: Dict, template: str, llm) -> str:
+        # Gli input sono serializzati sempre in forma compatta, così la chiave non dipende
+        # da PROMPT_SERIALIZATION né dall'ordine dei set
+        return DiskCache.make_key(
+            section,
+            serialize_inputs(inputs, "compact"),
+            template,
+            getattr(llm, "model_name", None),
+            getattr(llm, "temperature", None),
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        data = self.store.get_bytes(key)
+        return data.decode("utf-8") if data is not None else None
+
+    def put(self, key: str, html: str):
+        self.store.put_bytes(key, html.encode("utf-8"))
+
+    def stats(self):
+        return self.store.stats()
+
+
+_section_store = None
+_section_store_lock = threading.Lock()
+
+
+def get_section_store() -> Optional[SectionStore]:
+    global _section_store
+    if not global_config.SECTION_STORE_ENABLED:
+        return None
+    with _section_store_lock:
+        if _section_store is None:
+            _section_store = SectionStore(
+                Path(global_config.CACHE_DIRECTORY) / "sections",
+                max_bytes=global_config.SECTION_STORE_MAX_BYTES,
+            )
+        return _section_store
@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from lib_resume_builder_AIHawk import Resume, ResumeGenerator
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.fake_llm import ReplayChatModel, SyntheticChatModel
+
+# Misura i percorsi di generazione reali (thread, asyncio, streaming, batch di job description)
+# con un modello finto: nessuna chiave API e nessuna rete.
+#   python benchmark_pipeline.py --latency 0.8 --jobs 10
+#   python benchmark_pipeline.py --replay data_folder/output/open_ai_calls.json
+
+LIB_DIRECTORY = Path(__file__).resolve().parent.parent
+JOB_DESCRIPTION = "Senior Python developer for a fintech team: APIs, PostgreSQL, AWS, code review, mentoring."
+
+
+def configure(args):
+    global_config.STRINGS_MODULE_RESUME_PATH = LIB_DIRECTORY / "resume_prompt/strings_feder-cr.py"
+    global_config.STRINGS_MODULE_RESUME_JOB_DESCRIPTION_PATH = LIB_DIRECTORY / "resume_job_description_prompt/strings_feder-cr.py"
+    global_config.STRINGS_MODULE_NAME = "strings_feder_cr"
+    global_config.LOG_OUTPUT_FILE_PATH = Path(args.output)
+    global_config.LOG_OUTPUT_FILE_PATH.mkdir(parents=True, exist_ok=True)
+    global_config.API_KEY = "sk-benchmark"
+    # Ogni misura deve arrivare al modello, senza cache né limiti di rate
+    global_config.LLM_CACHE_ENABLED = False
+    global_config.SECTION_STORE_ENABLED = False
+    global_config.LLM_REQUESTS_PER_MINUTE = 1_000_000
+    global_config.LLM_TOKENS_PER_MINUTE = 1_000_000_000
+    if args.replay:
+        global_config.LLM_FACTORY = lambda model_name, temperature: ReplayChatModel(
+            log_path=args.replay, latency=args.latency, on_miss="synthetic",
+            fallback=SyntheticChatModel(latency_mean=args.latency, latency_stddev=args.latency_stddev),
+        )
+    else:
+        global_config.LLM_FACTORY = lambda model_name, temperature: SyntheticChatModel(
+            latency_mean=args.latency, latency_stddev=args.latency_stddev,
+            output_tokens_mean=args.output_tokens, seed=args.seed,
+        )
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:>32}: {time.perf_counter() - start:7.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resume", default=str(Path(__file__).resolve().parent / "yaml_example" / "plain_text_resume.yaml"))
+    parser.add_argument("--output", default="data_folder/benchmark")
+    parser.add_argument("--replay", help="open_ai_calls.json da cui riprodurre le risposte")
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--latency-stddev", type=float, default=0.3)
+    parser.add_argument("--output-tokens", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=5)
+    args = parser.parse_args()
+    configure(args)
+
+    with open(args.resume, "r", encoding="utf-8") as resume_file:
+        resume = Resume(resume_file.read())
+    generator = ResumeGenerator()
+    generator.set_resume_object(resume)
+
+    timed("threads (generate_html_resume)", lambda: generator.create_resume_body())
+    timed("asyncio (agenerate_html_resume)", lambda: asyncio.run(generator.acreate_resume_body()))
+
+    answerer = generator._create_answerer()
+    answerer.set_resume(resume)
+    start = time.perf_counter()
+    first_token = None
+    for index, fragment in enumerate(answerer.iter_html_resume()):
+        # Il primo frammento è il testo statico del layout, il secondo arriva dal modello
+        if first_token is None and index > 0:
+            first_token = time.perf_counter() - start
+    print(f"{'streaming, first token':>32}: {first_token or 0:7.3f}s")
+    print(f"{'streaming, complete':>32}: {time.perf_counter() - start:7.3f}s")
+
+    job_descriptions = [f"{JOB_DESCRIPTION} Posting #{index}." for index in range(args.jobs)]
+    timed(f"batch of {args.jobs} job descriptions",
+          lambda: generator.create_resume_bodies_for_job_descriptions(job_descriptions))
+    timed(f"{args.jobs} job descriptions one by one",
+          lambda: [generator.create_resume_body(job_description_text=text) for text in job_descriptions])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import textwrap
+import timeit
+from pathlib import Path
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+from lib_resume_builder_AIHawk.gpt_resume import LLMResumer, LoggerChatModel
+from lib_resume_builder_AIHawk.module_loader import load_module
+from lib_resume_builder_AIHawk.prompt_registry import get_prompt_registry, prompt_pack
+
+# Misura solo la costruzione di prompt e chain, senza chiamate al modello
+
+ITERATIONS = 2000
+
+
+def main():
+    strings_path = Path(__file__).resolve().parent.parent / "resume_prompt" / "strings_feder-cr.py"
+    strings = load_module(strings_path, "strings_feder_cr")
+    llm = LoggerChatModel(ChatOpenAI(model_name="gpt-4o-mini", openai_api_key="sk-benchmark"), use_cache=False)
+    registry = get_prompt_registry()
+    pack = prompt_pack(strings)
+    templates = [getattr(strings, name) for name in LLMResumer.section_prompts.values()]
+    sections = list(LLMResumer.section_prompts)
+
+    def rebuild():
+        for template in templates:
+            prompt = ChatPromptTemplate.from_template(textwrap.dedent(template))
+            prompt | llm.as_runnable() | StrOutputParser()
+
+    def lookup():
+        for section, template in zip(sections, templates):
+            registry.chain(pack, section, template, llm)
+
+    for name, func in (("rebuild per call", rebuild), ("registry lookup", lookup)):
+        seconds = timeit.timeit(func, number=ITERATIONS)
+        per_chain = seconds / (ITERATIONS * len(templates)) * 1e6
+        print(f"{name:>18}: {per_chain:8.2f} us per chain ({seconds:.3f}s total)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import time
+from pathlib import Path
+from lib_resume_builder_AIHawk import Resume, ResumeGenerator
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.fake_llm import SyntheticChatModel
+from lib_resume_builder_AIHawk.usage import track_usage
+
+# Confronta le sezioni piccole generate una per richiesta con le stesse fuse in una richiesta sola:
+# chiamate, token di input (la job description viene inviata una volta) e tempo totale.
+#   python benchmark_section_fusion.py --latency 0.8 --overhead 0.5 --runs 3
+
+LIB_DIRECTORY = Path(__file__).resolve().parent.parent
+JOB_DESCRIPTION = "Senior Python developer for a fintech team: APIs, PostgreSQL, AWS, code review, mentoring."
+FUSION_GROUP = ("achievements", "certifications", "additional_skills")
+
+
+def configure(args):
+    global_config.STRINGS_MODULE_RESUME_PATH = LIB_DIRECTORY / "resume_prompt/strings_feder-cr.py"
+    global_config.STRINGS_MODULE_RESUME_JOB_DESCRIPTION_PATH = LIB_DIRECTORY / "resume_job_description_prompt/strings_feder-cr.py"
+    global_config.STRINGS_MODULE_NAME = "strings_feder_cr"
+    global_config.LOG_OUTPUT_FILE_PATH = Path(args.output)
+    global_config.LOG_OUTPUT_FILE_PATH.mkdir(parents=True, exist_ok=True)
+    global_config.API_KEY = "sk-benchmark"
+    global_config.LLM_CACHE_ENABLED = False
+    global_config.SECTION_STORE_ENABLED = False
+    global_config.LLM_REQUESTS_PER_MINUTE = 1_000_000
+    global_config.LLM_TOKENS_PER_MINUTE = 1_000_000_000
+    global_config.LLM_FACTORY = lambda model_name, temperature: SyntheticChatModel(
+        latency_mean=args.latency, latency_stddev=args.latency_stddev, request_overhead=args.overhead,
+        output_tokens_mean=args.output_tokens, seed=args.seed,
+    )
+
+
+def measure(label, generator, runs):
+    with track_usage() as tracker:
+        start = time.perf_counter()
+        for index in range(runs):
+            generator.create_resume_body(job_description_text=f"{JOB_DESCRIPTION} Posting #{index}.")
+        elapsed = time.perf_counter() - start
+    group_usage = [usage for section, usage in tracker.sections.items()
+                   if set(section.split("+")) & set(FUSION_GROUP)]
+    calls = sum(usage["calls"] for usage in group_usage)
+    input_tokens = sum(usage["input_tokens"] for usage in group_usage)
+    total = tracker.totals()
+    print(f"{label:>10}: {elapsed:7.3f}s  group calls {calls:4d}  group input tokens {input_tokens:7d}  "
+          f"all calls {total['calls']:4d}  all input tokens {total['input_tokens']:7d}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resume", default=str(Path(__file__).resolve().parent / "yaml_example" / "plain_text_resume.yaml"))
+    parser.add_argument("--output", default="data_folder/benchmark")
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--latency-stddev", type=float, default=0.3)
+    parser.add_argument("--overhead", type=float, default=0.5, help="latenza pagata una volta per richiesta")
+    parser.add_argument("--output-tokens", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    configure(args)
+
+    with open(args.resume, "r", encoding="utf-8") as resume_file:
+        resume = Resume(resume_file.read())
+    generator = ResumeGenerator()
+    generator.set_resume_object(resume)
+
+    global_config.SECTION_FUSION_GROUPS = ()
+    measure("separate", generator, args.runs)
+    global_config.SECTION_FUSION_GROUPS = (FUSION_GROUP,)
+    measure("fused", generator, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from lib_resume_builder_AIHawk import Resume
+from lib_resume_builder_AIHawk.batch_backend import BatchBackend, LocalFileBatchBackend, run_bulk
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.fake_llm import SyntheticChatModel
+from lib_resume_builder_AIHawk.gpt_resume import LLMResumer
+from lib_resume_builder_AIHawk.log_writer import close_log_writers
+from lib_resume_builder_AIHawk.module_loader import load_module
+from lib_resume_builder_AIHawk.usage import track_usage
+
+LIB_DIRECTORY = Path(__file__).resolve().parent.parent
+RESUME_PATH = Path(__file__).resolve().parent / "yaml_example" / "plain_text_resume.yaml"
+
+
+class TestBulkMode(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        names = ("LLM_CACHE_ENABLED", "SECTION_STORE_ENABLED", "LOG_OUTPUT_FILE_PATH")
+        self.saved = {name: getattr(global_config, name) for name in names}
+        global_config.LLM_CACHE_ENABLED = False
+        global_config.SECTION_STORE_ENABLED = False
+        global_config.LOG_OUTPUT_FILE_PATH = Path(self.tmp.name)
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(global_config, name, value)
+        self.tmp.cleanup()
+
+    def _answerer(self) -> LLMResumer:
+        strings = load_module(LIB_DIRECTORY / "resume_prompt" / "strings_feder-cr.py", "strings_feder_cr")
+        answerer = LLMResumer("sk-test", strings, llm=SyntheticChatModel(model_name="gpt-4o-mini"))
+        answerer.set_resume(Resume(RESUME_PATH.read_text(encoding="utf-8")))
+        return answerer
+
+    def test_base_backend_is_abstract(self):
+        with self.assertRaises(TypeError):
+            BatchBackend()
+
+    def test_local_backend_accounts_every_section(self):
+        # Id dei resume non stringa: i risultati si ritrovano comunque
+        answerers = {1: self._answerer(), 2: self._answerer()}
+        backend = LocalFileBatchBackend(Path(self.tmp.name) / "batches")
+        with track_usage() as tracker:
+            bodies = run_bulk(answerers, backend=backend, work_directory=Path(self.tmp.name) / "bulk", poll_interval=0)
+        sections = len(answerers[1].section_prompts)
+        self.assertEqual(set(bodies), {1, 2})
+        self.assertEqual(bodies[1].count("<section>"), sections)
+        self.assertNotIn("failed", answerers[1].section_report.values())
+
+        totals = tracker.totals()
+        self.assertEqual(totals["calls"], 2 * sections)
+        self.assertGreater(totals["input_tokens"], 0)
+        self.assertGreater(totals["cost"], 0)
+
+        close_log_writers()
+        log_path = Path(self.tmp.name) / "open_ai_calls.json"
+        entries = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual(len(entries), 2 * sections)
+        self.assertEqual({entry["model"] for entry in entries}, {"gpt-4o-mini"})
+
+
+if __name__ == "__main__":
+    unittest.main()
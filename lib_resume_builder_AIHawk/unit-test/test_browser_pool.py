@@ -0,0 +1,51 @@
+import unittest
+from unittest import mock
+from selenium.common.exceptions import WebDriverException
+from lib_resume_builder_AIHawk.browser_pool import BrowserPool
+from lib_resume_builder_AIHawk.utils import HTML_string_to_PDF_bytes, HTML_strings_to_PDF_bytes
+
+
+def _crashing_driver():
+    # Driver finto: apre le schede ma cade al caricamento dell'HTML, come un Chrome terminato
+    def execute_cdp_cmd(command, params):
+        if command == "Network.clearBrowserCookies":
+            return {}
+        raise WebDriverException("chrome not reachable")
+
+    driver = mock.MagicMock()
+    driver.current_window_handle = "base"
+    driver.window_handles = ["base"]
+    driver.execute_script.return_value = 1
+    driver.execute_cdp_cmd.side_effect = execute_cdp_cmd
+    return driver
+
+
+class TestBrowserPoolErrors(unittest.TestCase):
+
+    def setUp(self):
+        self.drivers = []
+
+        def factory():
+            self.drivers.append(_crashing_driver())
+            return self.drivers[-1]
+
+        self.pool = BrowserPool(size=1, max_rss_mb=None, driver_factory=factory)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_render_error_discards_the_session(self):
+        with self.assertRaises(RuntimeError) as raised:
+            HTML_string_to_PDF_bytes("<html></html>", pool=self.pool)
+        self.assertIsInstance(raised.exception.__cause__, WebDriverException)
+        self.assertEqual(len(self.drivers), 1)
+        self.drivers[0].quit.assert_called_once()
+        # Il browser caduto non torna nel pool: il render successivo ne avvia uno nuovo
+        with self.assertRaises(RuntimeError):
+            HTML_strings_to_PDF_bytes({"resume": "<html></html>"}, pool=self.pool)
+        self.assertEqual(len(self.drivers), 2)
+        self.drivers[1].quit.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from lib_resume_builder_AIHawk.disk_cache import DiskCache
+
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_evicts_least_recently_used_down_to_low_water(self):
+        cache = DiskCache(self.directory, max_bytes=1000)
+        keys = [DiskCache.make_key("entry", index) for index in range(10)]
+        for key in keys:
+            cache.put_bytes(key, b"x" * 100)
+        # La prima voce letta di recente sopravvive, la seconda è la meno recente
+        self.assertIsNotNone(cache.get_bytes(keys[0]))
+        cache.put_bytes(DiskCache.make_key("entry", 10), b"x" * 100)
+        self.assertIsNotNone(cache.get_bytes(keys[0]))
+        self.assertIsNone(cache.get_bytes(keys[1]))
+        self.assertIsNone(cache.get_bytes(keys[2]))
+        self.assertEqual(cache.stats()["evictions"], 2)
+
+    def test_puts_at_capacity_do_not_rescan_the_directory(self):
+        cache = DiskCache(self.directory, max_bytes=100 * 1024)
+        with patch.object(DiskCache, "_entries", autospec=True, side_effect=DiskCache._entries) as entries:
+            for index in range(300):
+                cache.put_bytes(DiskCache.make_key("entry", index), b"x" * 1024)
+        self.assertEqual(entries.call_count, 1)
+        stored = sum(path.stat().st_size for path in self.directory.glob("*/*"))
+        self.assertLessEqual(stored, 100 * 1024)
+
+    def test_existing_entries_are_counted_after_restart(self):
+        DiskCache(self.directory, max_bytes=1000).put_bytes(DiskCache.make_key("old"), b"x" * 600)
+        cache = DiskCache(self.directory, max_bytes=1000)
+        cache.put_bytes(DiskCache.make_key("new"), b"x" * 600)
+        self.assertIsNone(cache.get_bytes(DiskCache.make_key("old")))
+        self.assertIsNotNone(cache.get_bytes(DiskCache.make_key("new")))
+
+    def test_failed_write_leaves_no_entry(self):
+        cache = DiskCache(self.directory, max_bytes=1000)
+        key = DiskCache.make_key("entry")
+
+        def failing_writer(cache_file):
+            cache_file.write(b"partial pdf")
+            raise RuntimeError("render failed")
+
+        with self.assertRaises(RuntimeError):
+            cache.put_stream(key, failing_writer)
+        # Né la voce né il file temporaneo: un PDF troncato non viene mai servito
+        self.assertIsNone(cache.get_bytes(key))
+        self.assertEqual(list(self.directory.glob("*/*")), [])
+        self.assertEqual(cache.stats()["writes"], 0)
+
+    def test_rewrite_replaces_the_whole_entry(self):
+        cache = DiskCache(self.directory, max_bytes=1000)
+        key = DiskCache.make_key("entry")
+        cache.put_bytes(key, b"x" * 500)
+        cache.put_bytes(key, b"y" * 10)
+        self.assertEqual(cache.get_bytes(key), b"y" * 10)
+        self.assertEqual(len(list(self.directory.glob("*/*"))), 1)
+        # La dimensione registrata è quella nuova: altri 900 byte entrano senza eviction
+        cache.put_bytes(DiskCache.make_key("other"), b"z" * 890)
+        self.assertEqual(cache.stats()["evictions"], 0)
+
+    def test_entry_removed_after_lookup_is_a_miss(self):
+        cache = DiskCache(self.directory, max_bytes=1000)
+        key = DiskCache.make_key("entry")
+        cache.put_bytes(key, b"data")
+        # Un'eviction concorrente tra get_path e la lettura
+        with patch.object(Path, "read_bytes", side_effect=FileNotFoundError):
+            self.assertIsNone(cache.get_bytes(key))
+        self.assertEqual(cache.stats()["hits"], 0)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
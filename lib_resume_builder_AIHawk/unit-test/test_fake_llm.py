@@ -0,0 +1,128 @@
+import asyncio
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from langchain_core.messages import HumanMessage
+from langchain_core.prompts import ChatPromptTemplate
+from lib_resume_builder_AIHawk import Resume
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.fake_llm import ReplayChatModel, SyntheticChatModel
+from lib_resume_builder_AIHawk.gpt_resume import LLMResumer
+from lib_resume_builder_AIHawk.module_loader import load_module
+from lib_resume_builder_AIHawk.section_executor import get_section_executor
+from lib_resume_builder_AIHawk.usage import track_usage
+
+LIB_DIRECTORY = Path(__file__).resolve().parent.parent
+RESUME_PATH = Path(__file__).resolve().parent / "yaml_example" / "plain_text_resume.yaml"
+
+
+class TestFakeChatModels(unittest.TestCase):
+
+    def setUp(self):
+        self.llm = SyntheticChatModel(latency_mean=0.0, latency_stddev=0.0, output_tokens_mean=20, seed=1)
+        self.prompt = ChatPromptTemplate.from_template("Write the {section} section").invoke({"section": "education"})
+
+    def test_invoke_accepts_prompt_values(self):
+        reply = self.llm.invoke(self.prompt)
+        self.assertIn('<section class="synthetic">', reply.content)
+        self.assertGreater(reply.usage_metadata["input_tokens"], 0)
+        self.assertEqual(reply.response_metadata["model_name"], "synthetic")
+        # Stesso prompt e stesso seed: stessa risposta
+        self.assertEqual(self.llm.invoke(self.prompt).content, reply.content)
+
+    def test_ainvoke_matches_invoke(self):
+        reply = asyncio.run(self.llm.ainvoke(self.prompt))
+        self.assertEqual(reply.content, self.llm.invoke(self.prompt).content)
+
+    def test_stream_carries_usage(self):
+        # LoggerChatModel.stream somma i frammenti: il totale deve avere testo completo e usage
+        streamed = None
+        for chunk in self.llm.stream(self.prompt):
+            streamed = chunk if streamed is None else streamed + chunk
+        self.assertEqual(streamed.content, self.llm.invoke(self.prompt).content)
+        self.assertGreater(streamed.usage_metadata["output_tokens"], 0)
+
+    def test_replay_returns_recorded_reply(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = Path(directory) / "open_ai_calls.json"
+            entry = {"prompts": {"prompt_1": "Write the education section"}, "replies": "<section>recorded</section>",
+                     "output_tokens": 5}
+            log_path.write_text(json.dumps(entry) + "\n", encoding="utf-8")
+            replay = ReplayChatModel(log_path=log_path)
+            self.assertEqual(replay.invoke(self.prompt).content, "<section>recorded</section>")
+            self.assertEqual(asyncio.run(replay.ainvoke(self.prompt)).content, "<section>recorded</section>")
+            with self.assertRaises(KeyError):
+                replay.invoke([HumanMessage(content="Another prompt")])
+            fallback = ReplayChatModel(log_path=log_path, on_miss="synthetic")
+            self.assertIn("synthetic", fallback.invoke("Another prompt").content)
+
+
+class TestGenerateWithFakeModel(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        names = ("LLM_CACHE_ENABLED", "SECTION_STORE_ENABLED", "LOG_OUTPUT_FILE_PATH", "SECTION_DEADLINE",
+                 "SECTION_FUSION_GROUPS")
+        self.saved = {name: getattr(global_config, name) for name in names}
+        global_config.LLM_CACHE_ENABLED = False
+        global_config.SECTION_STORE_ENABLED = False
+        global_config.LOG_OUTPUT_FILE_PATH = Path(self.tmp.name)
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(global_config, name, value)
+        self.tmp.cleanup()
+
+    def _answerer(self, latency: float, **model_fields) -> LLMResumer:
+        strings = load_module(LIB_DIRECTORY / "resume_prompt" / "strings_feder-cr.py", "strings_feder_cr")
+        llm = SyntheticChatModel(latency_mean=latency, latency_stddev=0.0, **model_fields)
+        answerer = LLMResumer("sk-test", strings, llm=llm)
+        answerer.set_resume(Resume(RESUME_PATH.read_text(encoding="utf-8")))
+        return answerer
+
+    def test_generate_html_resume(self):
+        answerer = self._answerer(0.0)
+        html = answerer.generate_html_resume()
+        self.assertTrue(html.startswith("<body>"))
+        self.assertEqual(html.count('<section class="synthetic">'), len(answerer.section_prompts))
+        self.assertEqual(set(answerer.section_report.values()), {"generated"})
+
+    def test_fused_sections_use_one_request(self):
+        global_config.SECTION_FUSION_GROUPS = (("achievements", "certifications", "additional_skills"),)
+        answerer = self._answerer(0.0)
+        with track_usage() as tracker:
+            html = answerer.generate_html_resume()
+        self.assertEqual(html.count('<section class="synthetic">'), len(answerer.section_prompts))
+        self.assertNotIn("<<<", html)
+        self.assertEqual(tracker.sections["achievements+certifications+additional_skills"]["calls"], 1)
+        self.assertEqual(set(answerer.section_report.values()), {"generated"})
+
+    def test_section_deadline_degrades_sync_generation(self):
+        global_config.SECTION_DEADLINE = 0.2
+        answerer = self._answerer(1.0)
+        start = time.monotonic()
+        html = answerer.generate_html_resume()
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertIn('class="degraded"', html)
+        self.assertEqual(set(answerer.section_report.values()), {"degraded:deterministic"})
+        # Le sezioni abbandonate finiscono comunque nei loro thread: si attende prima di ripristinare la config
+        while get_section_executor().stats()["in_flight"]:
+            time.sleep(0.05)
+
+    def test_section_deadline_degrades_stalled_stream(self):
+        global_config.SECTION_DEADLINE = 0.2
+        # Quattro frammenti da un secondo l'uno: il primo arriva dopo la scadenza
+        answerer = self._answerer(4.0, output_tokens_mean=1, output_tokens_stddev=0)
+        start = time.monotonic()
+        html = "".join(answerer.iter_html_resume())
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertEqual(html.count('class="degraded"'), len(answerer.section_prompts))
+        self.assertEqual(set(answerer.section_report.values()), {"degraded:deterministic"})
+        while get_section_executor().stats()["in_flight"]:
+            time.sleep(0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import tempfile
+import unittest
+from pathlib import Path
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.fake_llm import SyntheticChatModel
+from lib_resume_builder_AIHawk.llm_clients import close_clients, get_logger_chat_model
+
+
+class TestSharedLoggerChatModel(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        names = ("LLM_FACTORY", "LLM_CACHE_ENABLED", "LLM_HEDGE_ENABLED", "CACHE_DIRECTORY")
+        self.saved = {name: getattr(global_config, name) for name in names}
+        global_config.CACHE_DIRECTORY = Path(self.tmp.name)
+        global_config.LLM_FACTORY = lambda model_name, temperature: SyntheticChatModel(latency_mean=0.0)
+
+    def tearDown(self):
+        close_clients()
+        for name, value in self.saved.items():
+            setattr(global_config, name, value)
+        self.tmp.cleanup()
+
+    def test_config_changes_reach_the_pooled_model(self):
+        global_config.LLM_CACHE_ENABLED = True
+        global_config.LLM_HEDGE_ENABLED = False
+        model = get_logger_chat_model("sk-test")
+        self.assertIsNotNone(model.cache)
+        self.assertIsNone(model.hedge_policy)
+
+        global_config.LLM_CACHE_ENABLED = False
+        global_config.LLM_HEDGE_ENABLED = True
+        self.assertIs(get_logger_chat_model("sk-test"), model)
+        self.assertIsNone(model.cache)
+        self.assertIsNotNone(model.hedge_policy)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from lib_resume_builder_AIHawk.log_writer import JSONLWriter
+
+
+class TestJSONLWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "calls.json"
+        # Ogni batch è un write e un flush del file
+        patcher = patch.object(JSONLWriter, "_write_batch", autospec=True, side_effect=JSONLWriter._write_batch)
+        self.write_batch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _batches(self, writer):
+        # Anche i writer di altri test usano la classe: si contano solo le chiamate di questo
+        return sum(1 for call in self.write_batch.call_args_list if call.args[0] is writer)
+
+    def _entries(self):
+        return [json.loads(line) for line in self.path.read_text(encoding="utf-8").splitlines()]
+
+    def test_light_load_is_flushed_once_per_interval(self):
+        writer = JSONLWriter(self.path, flush_interval=0.5)
+        for index in range(10):
+            writer.write({"index": index})
+            time.sleep(0.01)
+        time.sleep(0.7)
+        self.assertEqual(self._batches(writer), 1)
+        writer.close()
+        self.assertEqual([entry["index"] for entry in self._entries()], list(range(10)))
+
+    def test_full_batch_is_written_before_the_interval(self):
+        writer = JSONLWriter(self.path, flush_interval=30, batch_size=5)
+        for index in range(12):
+            writer.write({"index": index})
+        time.sleep(0.2)
+        self.assertEqual(self._batches(writer), 2)
+        # La chiusura scrive subito le voci rimaste, senza attendere l'intervallo
+        started = time.monotonic()
+        writer.close()
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(self._batches(writer), 3)
+        self.assertEqual(len(self._entries()), 12)
+
+    def test_rotates_by_size_without_losing_entries(self):
+        writer = JSONLWriter(self.path, max_bytes=200, flush_interval=30, batch_size=5)
+        for index in range(20):
+            writer.write({"index": index, "text": "x" * 20})
+        writer.close()
+        files = sorted(Path(self.tmp.name).glob("calls*.json"))
+        # Un file per batch: ogni batch supera max_bytes e il file viene ruotato subito dopo
+        self.assertEqual(len(files), 5)
+        self.assertEqual(self.path.read_text(encoding="utf-8"), "")
+        indexes = [json.loads(line)["index"] for path in files for line in path.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual(sorted(indexes), list(range(20)))
+
+    def test_unserializable_entry_is_skipped(self):
+        writer = JSONLWriter(self.path, flush_interval=0.05)
+        writer.write({"index": 0, "nested": {1: {2, 3}}})
+        writer.write({"index": 1, "circular": None})
+        circular = {}
+        circular["self"] = circular
+        writer.write({"index": 2, "circular": circular})
+        writer.close()
+        self.assertEqual([entry["index"] for entry in self._entries()], [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
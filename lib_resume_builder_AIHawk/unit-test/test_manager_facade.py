@@ -0,0 +1,82 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from lib_resume_builder_AIHawk.asset_bundle import AssetBundle
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.disk_cache import DiskCache
+from lib_resume_builder_AIHawk.manager_facade import FacadeManager
+from lib_resume_builder_AIHawk.resume_generator import ResumeGenerator
+from lib_resume_builder_AIHawk.style_manager import StyleManager
+from lib_resume_builder_AIHawk.utils import HTML_strings_to_PDF_bytes, PDF_cache_key
+
+BODY = "<body><section>generated once</section></body>"
+
+
+class TestStyleFanOut(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        names = ("STRINGS_MODULE_RESUME_PATH", "STRINGS_MODULE_RESUME_JOB_DESCRIPTION_PATH", "STRINGS_MODULE_NAME",
+                 "STYLES_DIRECTORY", "LOG_OUTPUT_FILE_PATH", "API_KEY")
+        # FacadeManager scrive i percorsi della libreria in global_config
+        self.saved = {name: getattr(global_config, name) for name in names}
+        self.addCleanup(self._restore_config)
+        # Stili senza rete: i CSS remoti restano riferimenti
+        bundle = AssetBundle(Path(self.tmp.name) / "assets", fetch_on_miss=False)
+        patcher = mock.patch("lib_resume_builder_AIHawk.resume_generator.get_asset_bundle", return_value=bundle)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.generator = ResumeGenerator()
+        self.cache = DiskCache(Path(self.tmp.name) / "pdf", max_bytes=1024 * 1024)
+        self.pool = mock.Mock()
+        self.pool.page.side_effect = AssertionError("no browser expected")
+        self.facade = FacadeManager("sk-test", StyleManager(), self.generator, None, Path(self.tmp.name),
+                                    browser_pool=self.pool, pdf_cache=self.cache)
+        self.styles = list(self.facade.style_manager.get_styles())
+
+    def _restore_config(self):
+        for name, value in self.saved.items():
+            setattr(global_config, name, value)
+
+    def test_body_is_generated_once_for_every_style(self):
+        with mock.patch.object(self.generator, "create_resume_body", return_value=BODY) as create_body, \
+                mock.patch("lib_resume_builder_AIHawk.manager_facade.HTML_strings_to_PDF_bytes",
+                           side_effect=lambda htmls, **kwargs: {style: style.encode() for style in htmls}) as render:
+            pdfs = self.facade.pdf_bytes_for_styles(job_description_text="Python developer")
+        create_body.assert_called_once_with(None, "Python developer")
+        render.assert_called_once()
+        htmls = render.call_args.args[0]
+        cache_key_parts = render.call_args.kwargs["cache_key_parts"]
+        self.assertEqual(list(pdfs), self.styles)
+        self.assertGreater(len(self.styles), 1)
+        for style in self.styles:
+            css = self.facade.style_manager.get_style_path(style).read_bytes()
+            self.assertIn(BODY, htmls[style])
+            self.assertIn(css.decode("utf-8"), htmls[style])
+            self.assertEqual(cache_key_parts[style], (css,))
+
+    def test_unknown_style_is_rejected_before_generation(self):
+        with mock.patch.object(self.generator, "create_resume_body") as create_body:
+            with self.assertRaises(ValueError):
+                self.facade.pdf_bytes_for_styles(styles=[self.styles[0], "Missing"])
+        create_body.assert_not_called()
+
+    def test_cached_styles_are_not_rendered_again(self):
+        htmls = {style: self.generator.build_html(BODY, self.facade.style_manager.get_style_path(style))
+                 for style in self.styles}
+        parts = {style: (f"css {style}",) for style in self.styles}
+        for style, html in htmls.items():
+            self.cache.put_bytes(PDF_cache_key(html, parts[style]), style.encode())
+        pdfs = HTML_strings_to_PDF_bytes(htmls, pool=self.pool, cache=self.cache, cache_key_parts=parts)
+        self.assertEqual(pdfs, {style: style.encode() for style in self.styles})
+        self.pool.page.assert_not_called()
+        # Un altro CSS è un'altra voce
+        other_parts = dict(parts, **{self.styles[0]: ("changed css",)})
+        with self.assertRaises(AssertionError):
+            HTML_strings_to_PDF_bytes(htmls, pool=self.pool, cache=self.cache, cache_key_parts=other_parts)
+
+
+if __name__ == "__main__":
+    unittest.main()
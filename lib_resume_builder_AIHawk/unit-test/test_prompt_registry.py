@@ -0,0 +1,58 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from langchain_core.prompts import ChatPromptTemplate
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.fake_llm import SyntheticChatModel
+from lib_resume_builder_AIHawk.gpt_resume import LoggerChatModel
+from lib_resume_builder_AIHawk.prompt_registry import PromptRegistry
+
+TEMPLATE = """
+    Write the {section} section
+    """
+
+
+class TestPromptRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = PromptRegistry()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved_log_path = global_config.LOG_OUTPUT_FILE_PATH
+        global_config.LOG_OUTPUT_FILE_PATH = Path(self.tmp.name)
+
+    def tearDown(self):
+        global_config.LOG_OUTPUT_FILE_PATH = self.saved_log_path
+        self.tmp.cleanup()
+
+    def _model(self) -> LoggerChatModel:
+        return LoggerChatModel(SyntheticChatModel(latency_mean=0.0, latency_stddev=0.0), use_cache=False)
+
+    def test_prompt_is_compiled_once(self):
+        with patch.object(ChatPromptTemplate, "from_template", wraps=ChatPromptTemplate.from_template) as compile_:
+            first = self.registry.prompt("pack", "education", TEMPLATE)
+            second = self.registry.prompt("pack", "education", TEMPLATE)
+        self.assertIs(first, second)
+        self.assertEqual(compile_.call_count, 1)
+        # Il template viene compilato senza l'indentazione del modulo strings
+        self.assertEqual(first.input_variables, ["section"])
+        self.assertTrue(first.messages[0].prompt.template.startswith("\nWrite"))
+
+    def test_changed_template_or_pack_is_recompiled(self):
+        first = self.registry.prompt("pack", "education", TEMPLATE)
+        self.assertIsNot(self.registry.prompt("pack", "education", TEMPLATE + "Be brief."), first)
+        self.assertIsNot(self.registry.prompt("other_pack", "education", TEMPLATE), first)
+
+    def test_chains_are_cached_per_model(self):
+        model, other_model = self._model(), self._model()
+        chain = self.registry.chain("pack", "education", TEMPLATE, model)
+        self.assertIs(self.registry.chain("pack", "education", TEMPLATE, model), chain)
+        other_chain = self.registry.chain("pack", "education", TEMPLATE, other_model)
+        self.assertIsNot(other_chain, chain)
+        # Il prompt compilato resta condiviso tra i modelli
+        self.assertIs(other_chain.first, chain.first)
+        self.assertIn("synthetic", chain.invoke({"section": "education"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
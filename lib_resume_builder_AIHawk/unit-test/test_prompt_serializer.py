@@ -0,0 +1,40 @@
+import json
+import unittest
+from lib_resume_builder_AIHawk.prompt_serializer import serialize_for_prompt, serialize_inputs
+from lib_resume_builder_AIHawk.resume import Achievement, ExperienceDetails, Language
+
+
+class TestPromptSerializer(unittest.TestCase):
+
+    def test_records_become_a_table_without_empty_fields(self):
+        experiences = [
+            ExperienceDetails(position="Engineer", company="Acme | Co", employment_period="2020 - 2022",
+                              location=None, industry="", skills_acquired=["Python", "SQL"],
+                              key_responsibilities=[{"responsibility_1": "Built APIs"}, {"responsibility_2": "Led reviews"}]),
+            ExperienceDetails(position="Intern", company="Beta", employment_period="2019", location="Genoa, Italy",
+                              industry=None),
+        ]
+        self.assertEqual(serialize_for_prompt(experiences), "\n".join([
+            "position | company | employment_period | key_responsibilities | skills_acquired | location",
+            "Engineer | Acme / Co | 2020 - 2022 | Built APIs, Led reviews | Python, SQL | ",
+            "Intern | Beta | 2019 |  |  | Genoa, Italy",
+        ]))
+
+    def test_objects_and_simple_lists(self):
+        self.assertEqual(serialize_for_prompt(Language(language="Italian", proficiency="Native")),
+                         "language: Italian\nproficiency: Native")
+        self.assertEqual(serialize_for_prompt({"SQL", "Python"}), "Python, SQL")
+        self.assertEqual(serialize_for_prompt(["Led a team, shipped a product", "Mentoring"]),
+                         "Led a team, shipped a product\nMentoring")
+
+    def test_shorter_than_compact_json(self):
+        inputs = {"achievements": [Achievement(name="Scholarship", description="Merit scholarship 2020-2023")] * 3,
+                  "job_description": ""}
+        compact = serialize_inputs(inputs)
+        self.assertEqual(compact["job_description"], "")
+        as_json = json.dumps([achievement.model_dump() for achievement in inputs["achievements"]], separators=(",", ":"))
+        self.assertLess(len(compact["achievements"]), len(as_json) * 0.8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import time
+import unittest
+from lib_resume_builder_AIHawk.rate_limiter import LLMRateLimiter, parse_reset_duration
+
+
+class TestParseResetDuration(unittest.TestCase):
+
+    def test_formats(self):
+        self.assertEqual(parse_reset_duration("20ms"), 0.02)
+        self.assertEqual(parse_reset_duration("1s"), 1)
+        self.assertEqual(parse_reset_duration("6m0s"), 360)
+        self.assertEqual(parse_reset_duration("1h2m3.5s"), 3723.5)
+        self.assertIsNone(parse_reset_duration(None))
+        self.assertIsNone(parse_reset_duration("soon"))
+
+
+class TestRateLimiterHeaders(unittest.TestCase):
+
+    def setUp(self):
+        self.limiter = LLMRateLimiter(requests_per_minute=500, tokens_per_minute=200000)
+
+    def test_limits_from_headers_replace_configured_capacity(self):
+        self.limiter.update_from_headers({"x-ratelimit-limit-requests": "60", "X-RateLimit-Limit-Tokens": "1000"})
+        self.assertEqual(self.limiter.requests.capacity, 60)
+        self.assertEqual(self.limiter.tokens.capacity, 1000)
+        self.assertEqual(self.limiter.requests.rate, 1)
+
+    def test_remaining_lowers_the_local_level(self):
+        self.limiter.update_from_headers({"x-ratelimit-remaining-tokens": "150"})
+        self.assertLess(self.limiter.tokens.level, 151)
+        # Un remaining più alto del livello locale non restituisce token già spesi
+        self.limiter.update_from_headers({"x-ratelimit-remaining-tokens": "5000"})
+        self.assertLess(self.limiter.tokens.level, 152)
+
+    def test_exhausted_limit_pauses_until_reset(self):
+        self.limiter.update_from_headers({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "2s"})
+        wait = self.limiter._try_acquire(1)
+        self.assertGreater(wait, 1.9)
+        self.assertLessEqual(wait, 2)
+
+    def test_invalid_values_are_ignored(self):
+        self.limiter.update_from_headers({"x-ratelimit-limit-requests": "n/a", "x-ratelimit-remaining-requests": "?"})
+        self.limiter.update_from_headers(None)
+        self.assertEqual(self.limiter.requests.capacity, 500)
+        self.assertEqual(self.limiter._try_acquire(1), 0)
+
+    def test_reconcile_charges_actual_tokens(self):
+        self.assertEqual(self.limiter._try_acquire(100), 0)
+        before = self.limiter.tokens.level
+        self.limiter.reconcile(100, 400)
+        self.assertEqual(self.limiter.tokens.level, before - 300)
+
+    def test_pause_blocks_every_request(self):
+        self.limiter.pause(0.1)
+        self.assertGreater(self.limiter._try_acquire(1), 0)
+        time.sleep(0.11)
+        self.assertEqual(self.limiter._try_acquire(1), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
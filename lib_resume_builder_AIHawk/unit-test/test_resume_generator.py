@@ -0,0 +1,35 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from lib_resume_builder_AIHawk.asset_bundle import AssetBundle
+from lib_resume_builder_AIHawk.resume_generator import ResumeGenerator
+
+STYLE_PATH = Path(__file__).resolve().parent.parent / "resume_style" / "style_cloyola.css"
+
+
+class TestBuildHtml(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bundle = AssetBundle(Path(self.tmp.name), fetch_on_miss=False)
+        patcher = mock.patch("lib_resume_builder_AIHawk.resume_generator.get_asset_bundle", return_value=self.bundle)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_generated_body_is_not_inlined(self):
+        # Testo arrivato da una job description: nessun download e nessun contenuto incorporato
+        body = ('<body><link href="https://attacker.example/x.css" rel="stylesheet">'
+                '<style>@import url("https://attacker.example/y.css");</style></body>')
+        with mock.patch.object(self.bundle, "stylesheet", return_value="/* local */") as stylesheet:
+            html = ResumeGenerator().build_html(body, STYLE_PATH)
+        requested = [call.args[0] for call in stylesheet.call_args_list]
+        self.assertTrue(requested)
+        self.assertFalse(any("attacker.example" in url for url in requested))
+        self.assertIn(body, html)
+        self.assertNotIn("fonts.googleapis.com", html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+import httpx
+import openai
+from langchain_core.prompts import ChatPromptTemplate
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.fake_llm import SyntheticChatModel
+from lib_resume_builder_AIHawk.gpt_resume import LoggerChatModel
+from lib_resume_builder_AIHawk.retry_policy import (CircuitBreaker, CircuitOpenError, EmptyStreamError, is_retryable,
+                                                    is_upstream_failure, retry_after)
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def _status_error(error_class, status_code: int, headers=None, message: str = "error"):
+    response = httpx.Response(status_code, headers=headers or {}, request=REQUEST)
+    return error_class(message, response=response, body=None)
+
+
+class TestRetryClassification(unittest.TestCase):
+
+    def test_service_errors_are_retried(self):
+        for err in (openai.APIConnectionError(request=REQUEST),
+                    EmptyStreamError("no chunks"),
+                    _status_error(openai.RateLimitError, 429),
+                    _status_error(openai.InternalServerError, 503),
+                    _status_error(openai.APIStatusError, 408)):
+            self.assertTrue(is_retryable(err), err)
+
+    def test_request_and_local_errors_fail_fast(self):
+        for err in (_status_error(openai.BadRequestError, 400),
+                    _status_error(openai.AuthenticationError, 401),
+                    KeyError("section"),
+                    TypeError("bad argument")):
+            self.assertFalse(is_retryable(err), err)
+
+    def test_only_service_errors_count_for_the_circuit(self):
+        self.assertTrue(is_upstream_failure(_status_error(openai.InternalServerError, 500)))
+        self.assertTrue(is_upstream_failure(openai.APIConnectionError(request=REQUEST)))
+        self.assertFalse(is_upstream_failure(_status_error(openai.RateLimitError, 429)))
+
+    def test_retry_after_sources(self):
+        self.assertEqual(retry_after(_status_error(openai.RateLimitError, 429, {"retry-after-ms": "250"})), 0.25)
+        self.assertEqual(retry_after(_status_error(openai.RateLimitError, 429, {"Retry-After": "3"})), 3)
+        # Tra i reset si usa quello del limite esaurito
+        headers = {"x-ratelimit-reset-requests": "2s", "x-ratelimit-remaining-requests": "10",
+                   "x-ratelimit-reset-tokens": "6m0s", "x-ratelimit-remaining-tokens": "0"}
+        self.assertEqual(retry_after(_status_error(openai.RateLimitError, 429, headers)), 360)
+        err = _status_error(openai.RateLimitError, 429, message="Please try again in 1.5s.")
+        self.assertEqual(retry_after(err), 1.5)
+        self.assertIsNone(retry_after(_status_error(openai.RateLimitError, 429)))
+
+
+class TestRetryBudget(unittest.TestCase):
+
+    def setUp(self):
+        names = ("LLM_RETRY_MAX_ATTEMPTS", "LLM_RETRY_BASE_DELAY", "LLM_RETRY_MAX_DELAY", "LLM_RETRY_BUDGET")
+        self.saved = {name: getattr(global_config, name) for name in names}
+        global_config.LLM_RETRY_MAX_ATTEMPTS = 6
+        global_config.LLM_RETRY_BASE_DELAY = 1.0
+        global_config.LLM_RETRY_MAX_DELAY = 4.0
+        global_config.LLM_RETRY_BUDGET = 10.0
+        self.breaker = CircuitBreaker(failure_threshold=100, reset_timeout=30.0)
+        self.rate_limiter = mock.Mock()
+        self.model = LoggerChatModel(SyntheticChatModel(), use_cache=False, rate_limiter=self.rate_limiter,
+                                     circuit_breaker=self.breaker)
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(global_config, name, value)
+
+    def test_backoff_stays_within_max_delay(self):
+        err = _status_error(openai.InternalServerError, 500)
+        for attempt in range(5):
+            wait = self.model._retry_wait(err, attempt, time.monotonic())
+            self.assertGreaterEqual(wait, 0)
+            self.assertLessEqual(wait, min(4.0, 2 ** attempt))
+        self.rate_limiter.pause.assert_not_called()
+
+    def test_rate_limit_waits_for_the_server_and_pauses_everyone(self):
+        err = _status_error(openai.RateLimitError, 429, {"retry-after": "2"})
+        wait = self.model._retry_wait(err, 0, time.monotonic())
+        self.assertGreaterEqual(wait, 2)
+        self.assertLessEqual(wait, 3)
+        self.rate_limiter.pause.assert_called_once_with(2.0)
+
+    def test_stops_when_the_budget_or_attempts_run_out(self):
+        err = _status_error(openai.RateLimitError, 429, {"retry-after": "2"})
+        # Già trascorsi 9 dei 10 secondi: l'attesa di 2 non entra nel budget
+        with self.assertRaises(openai.RateLimitError):
+            self.model._retry_wait(err, 0, time.monotonic() - 9)
+        with self.assertRaises(openai.RateLimitError):
+            self.model._retry_wait(err, 5, time.monotonic())
+        self.rate_limiter.pause.assert_not_called()
+
+    def test_non_retryable_error_is_raised_at_once(self):
+        err = _status_error(openai.BadRequestError, 400)
+        with self.assertRaises(openai.BadRequestError):
+            self.model._retry_wait(err, 0, time.monotonic())
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_threshold_and_recovers_through_probe(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        self.assertFalse(breaker.before_call())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        time.sleep(0.06)
+        # Dopo reset_timeout passa una sola chiamata di prova
+        self.assertTrue(breaker.before_call())
+        self.assertEqual(breaker.state, "half_open")
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        self.assertEqual(breaker.failures, 0)
+        self.assertFalse(breaker.before_call())
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+        breaker.record_failure()
+        self.assertTrue(breaker.before_call())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+    def test_released_probe_lets_another_through(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+        breaker.record_failure()
+        self.assertTrue(breaker.before_call())
+        breaker.release_probe()
+        self.assertTrue(breaker.before_call())
+        self.assertEqual(breaker.state, "half_open")
+
+
+class TestCircuitProbe(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved_log_path = global_config.LOG_OUTPUT_FILE_PATH
+        global_config.LOG_OUTPUT_FILE_PATH = Path(self.tmp.name)
+        self.prompt = ChatPromptTemplate.from_template("Write the {section} section").invoke({"section": "education"})
+        # Circuito aperto con reset immediato: la prossima chiamata è la prova half_open
+        self.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+        self.breaker.record_failure()
+
+    def tearDown(self):
+        global_config.LOG_OUTPUT_FILE_PATH = self.saved_log_path
+        self.tmp.cleanup()
+
+    def _model(self, latency: float) -> LoggerChatModel:
+        llm = SyntheticChatModel(latency_mean=latency, latency_stddev=0.0, output_tokens_mean=10)
+        return LoggerChatModel(llm, use_cache=False, circuit_breaker=self.breaker)
+
+    def _assert_next_call_passes(self):
+        self._model(0.0)(self.prompt)
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_cancelled_async_probe_is_released(self):
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(self._model(1.0).acall(self.prompt), 0.05))
+        self._assert_next_call_passes()
+
+    def test_abandoned_stream_probe_is_released(self):
+        stream = self._model(0.0).stream(self.prompt)
+        next(stream)
+        stream.close()
+        self._assert_next_call_passes()
+
+
+if __name__ == "__main__":
+    unittest.main()
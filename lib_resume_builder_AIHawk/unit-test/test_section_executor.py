@@ -0,0 +1,55 @@
+import threading
+import unittest
+from lib_resume_builder_AIHawk.section_executor import SectionExecutor, current_tenant, tenant_scope
+
+
+class TestSectionExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = SectionExecutor(max_in_flight=1)
+        self.order = []
+        # Il primo task occupa l'unico posto finché gli altri non sono tutti in coda
+        self.release = threading.Event()
+        self.blocker = self.executor.submit(self.release.wait, tenant="blocker")
+
+    def tearDown(self):
+        self.release.set()
+        self.executor.shutdown()
+
+    def _record(self, name):
+        self.order.append((name, current_tenant()))
+
+    def test_tenants_are_served_round_robin(self):
+        futures = [self.executor.submit(self._record, f"a{index}", tenant="a") for index in range(3)]
+        futures.append(self.executor.submit(self._record, "b0", tenant="b"))
+        futures.append(self.executor.submit(self._record, "c0", tenant="c"))
+        self.assertEqual(self.executor.stats()["queue_depth_by_tenant"], {"a": 3, "b": 1, "c": 1})
+        self.release.set()
+        for future in futures:
+            future.result(timeout=5)
+        # Un tenant con molte sezioni non fa aspettare gli altri fino alla fine della sua coda
+        self.assertEqual([name for name, _ in self.order], ["a0", "b0", "c0", "a1", "a2"])
+
+    def test_tenant_and_context_come_from_the_caller(self):
+        with tenant_scope("acme"):
+            future = self.executor.submit(self._record, "task")
+        self.assertEqual(self.executor.stats()["queue_depth_by_tenant"], {"acme": 1})
+        self.release.set()
+        future.result(timeout=5)
+        self.assertEqual(self.order, [("task", "acme")])
+        self.assertEqual(current_tenant(), "default")
+
+    def test_max_in_flight_is_respected(self):
+        futures = [self.executor.submit(self._record, index) for index in range(3)]
+        stats = self.executor.stats()
+        self.assertEqual(stats["in_flight"], 1)
+        self.assertEqual(stats["queue_depth"], 3)
+        self.release.set()
+        for future in futures:
+            future.result(timeout=5)
+        self.blocker.result(timeout=5)
+        self.assertEqual(self.executor.stats()["completed"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from lib_resume_builder_AIHawk.section_fusion import fused_prompt, requested_sections, split_fused_reply
+
+SECTIONS = ["achievements", "certifications", "additional_skills"]
+
+
+class TestSplitFusedReply(unittest.TestCase):
+
+    def test_well_formed_reply(self):
+        reply = ("<<<SECTION achievements>>>\n<ul>a</ul>\n<<<END achievements>>>\n"
+                 "<<<SECTION certifications>>><ul>c</ul><<<END certifications>>>\n"
+                 "<<<SECTION additional_skills>>>\n<ul>s</ul>\n<<<END additional_skills>>>")
+        self.assertEqual(split_fused_reply(reply, SECTIONS),
+                         {"achievements": "<ul>a</ul>", "certifications": "<ul>c</ul>", "additional_skills": "<ul>s</ul>"})
+
+    def test_malformed_markers_leave_sections_out(self):
+        reply = (
+            # Fine con il nome sbagliato
+            "<<<SECTION achievements>>><ul>a</ul><<<END certifications>>>\n"
+            # Fine mancante
+            "<<<SECTION certifications>>><ul>c</ul>\n"
+            # Marcatore incompleto
+            "<<SECTION additional_skills>>><ul>s</ul><<<END additional_skills>>>"
+        )
+        self.assertEqual(split_fused_reply(reply, SECTIONS), {})
+
+    def test_unrequested_empty_and_duplicate_sections(self):
+        reply = ("<<<SECTION education>>><p>e</p><<<END education>>>"
+                 "<<<SECTION achievements>>>   <<<END achievements>>>"
+                 "<<<SECTION certifications>>><ul>first</ul><<<END certifications>>>"
+                 "<<<SECTION certifications>>><ul>second</ul><<<END certifications>>>")
+        # Le sezioni non restituite vengono rigenerate singolarmente dal chiamante
+        self.assertEqual(split_fused_reply(reply, SECTIONS), {"certifications": "<ul>first</ul>"})
+
+    def test_reply_without_markers(self):
+        self.assertEqual(split_fused_reply("<ul>everything together</ul>", SECTIONS), {})
+        self.assertEqual(split_fused_reply("", SECTIONS), {})
+
+    def test_prompt_requests_every_section_once(self):
+        prompt = fused_prompt([(section, f"Write {section}") for section in SECTIONS], job_description="JD")
+        self.assertEqual(requested_sections(prompt), SECTIONS)
+        self.assertEqual(prompt.count("JD"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import tempfile
+import unittest
+from pathlib import Path
+from lib_resume_builder_AIHawk import Resume
+from lib_resume_builder_AIHawk.fake_llm import SyntheticChatModel
+from lib_resume_builder_AIHawk.gpt_resume import LLMResumer
+from lib_resume_builder_AIHawk.module_loader import load_module
+from lib_resume_builder_AIHawk.resume import Achievement, Certifications
+from lib_resume_builder_AIHawk.section_store import SectionStore
+
+LIB_DIRECTORY = Path(__file__).resolve().parent.parent
+RESUME_PATH = Path(__file__).resolve().parent / "yaml_example" / "plain_text_resume.yaml"
+
+
+class TestSectionKeys(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        strings = load_module(LIB_DIRECTORY / "resume_prompt" / "strings_feder-cr.py", "strings_feder_cr")
+        self.answerer = LLMResumer("sk-test", strings, llm=SyntheticChatModel())
+        self.answerer.section_store = SectionStore(Path(self.tmp.name), max_bytes=1024 * 1024)
+        self.answerer.set_resume(Resume(RESUME_PATH.read_text(encoding="utf-8")))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_ignores_fields_the_prompt_does_not_use(self):
+        key = self.answerer._section_key("achievements")
+        # Il prompt di achievements senza job description non usa le certificazioni
+        self.answerer.resume.certifications = [Certifications(name="AWS", description="Solutions Architect")]
+        self.assertEqual(self.answerer._section_key("achievements"), key)
+        self.answerer.resume.achievements = [Achievement(name="Award", description="Best paper")]
+        self.assertNotEqual(self.answerer._section_key("achievements"), key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import tempfile
+import unittest
+from pathlib import Path
+from langchain_core.prompts import ChatPromptTemplate
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.fake_llm import SyntheticChatModel
+from lib_resume_builder_AIHawk.gpt_resume import LoggerChatModel
+from lib_resume_builder_AIHawk.usage import BudgetExceededError, track_usage
+
+
+class TestBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved_log_path = global_config.LOG_OUTPUT_FILE_PATH
+        global_config.LOG_OUTPUT_FILE_PATH = Path(self.tmp.name)
+        template = ChatPromptTemplate.from_template("Write the {section} section")
+        self.prompts = [template.invoke({"section": section}) for section in ("education", "header", "skills")]
+
+    def tearDown(self):
+        global_config.LOG_OUTPUT_FILE_PATH = self.saved_log_path
+        self.tmp.cleanup()
+
+    def _model(self, model_name: str) -> LoggerChatModel:
+        llm = SyntheticChatModel(model_name=model_name, latency_mean=0.0, latency_stddev=0.0, output_tokens_mean=50)
+        return LoggerChatModel(llm, use_cache=False)
+
+    def test_token_budget_aborts_after_the_limit(self):
+        model = self._model("gpt-4o")
+        with track_usage(max_tokens=10) as tracker:
+            # La chiamata che supera il limite si completa, le successive falliscono prima della richiesta
+            model(self.prompts[0])
+            calls = tracker.totals()["calls"]
+            with self.assertRaises(BudgetExceededError):
+                model(self.prompts[1])
+        self.assertEqual(tracker.totals()["calls"], calls)
+        self.assertTrue(tracker.report()["exceeded"])
+
+    def test_cost_budget_uses_model_prices(self):
+        model = self._model("gpt-4o")
+        with track_usage(max_cost=1.0) as tracker:
+            for prompt in self.prompts:
+                model(prompt)
+        totals = tracker.totals()
+        input_price, output_price = global_config.LLM_PRICES["gpt-4o"]
+        self.assertAlmostEqual(totals["cost"], totals["input_tokens"] * input_price + totals["output_tokens"] * output_price)
+        self.assertFalse(tracker.exceeded())
+        with track_usage(max_cost=totals["cost"] / 2):
+            model(self.prompts[0])
+            with self.assertRaises(BudgetExceededError):
+                model(self.prompts[1])
+
+    def test_downgrade_switches_to_the_cheaper_model(self):
+        model = self._model("gpt-4o")
+        with track_usage(max_tokens=10, on_exceeded="downgrade", downgrade_model="gpt-4o-mini") as tracker:
+            for prompt in self.prompts:
+                model(prompt)
+        models = [name for usage in tracker.sections.values() for name in usage["models"]]
+        self.assertEqual(models, ["gpt-4o", "gpt-4o-mini"])
+        self.assertEqual(tracker.totals()["calls"], 3)
+        # Il modello condiviso non viene modificato
+        self.assertEqual(model.llm.model_name, "gpt-4o")
+
+    def test_downgrade_to_the_same_model_stops(self):
+        model = self._model("gpt-4o-mini")
+        with track_usage(max_tokens=10, on_exceeded="downgrade", downgrade_model="gpt-4o-mini"):
+            model(self.prompts[0])
+            with self.assertLogs("lib_resume_builder_AIHawk.gpt_resume", "WARNING") as logs:
+                for prompt in self.prompts[1:]:
+                    with self.assertRaises(BudgetExceededError):
+                        model(prompt)
+        self.assertEqual(len(logs.records), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import contextvars
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from lib_resume_builder_AIHawk.config import global_config
+
+logger = logging.getLogger(__name__)
+
+_current_tracker = contextvars.ContextVar("usage_tracker", default=None)
+_current_section = contextvars.ContextVar("llm_section", default=None)
+
+
+class BudgetExceededError(Exception):
+    pass
+
+
+def model_prices(model_name: str) -> Tuple[float, float]:
+    # Prezzi per token (input, output); i nomi con data, es. gpt-4o-mini-2024-07-18,
+    # usano la voce con il prefisso più lungo
+    prices = global_config.LLM_PRICES
+    if model_name in prices:
+        return prices[model_name]
+    candidates = [name for name in prices if model_name and model_name.startswith(name)]
+    if candidates:
+        return prices[max(candidates, key=len)]
+    logger.warning(f"No price configured for model {model_name!r}, counting its cost as 0")
+    return 0.0, 0.0
+
+
+def token_cost(model_name: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = model_prices(model_name)
+    return input_tokens * input_price + output_tokens * output_price
+
+
+class UsageTracker:
+
+    def __init__(self, max_tokens: Optional[int] = None, max_cost: Optional[float] = None,
+                 on_exceeded: str = "abort", downgrade_model: Optional[str] = None):
+        if on_exceeded not in ("abort", "downgrade"):
+            raise ValueError("on_exceeded must be 'abort' or 'downgrade'")
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.on_exceeded = on_exceeded
+        self.downgrade_model = downgrade_model or global_config.LLM_BUDGET_DOWNGRADE_MODEL
+        self.sections: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, section: Optional[str], model_name: str, input_tokens: int, output_tokens: int,
+               cost: float, cached: bool = False):
+        with self._lock:
+            usage = self.sections.setdefault(section or "other", {
+                "calls": 0,
+                "cached_calls": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "total_tokens": 0,
+                "cost": 0.0,
+                "models": [],
+            })
+            usage["calls"] += 1
+            if model_name and model_name not in usage["models"]:
+                usage["models"].append(model_name)
+            if cached:
+                usage["cached_calls"] += 1
+                return
+            usage["input_tokens"] += input_tokens
+            usage["output_tokens"] += output_tokens
+            usage["total_tokens"] += input_tokens + output_tokens
+            usage["cost"] += cost
+
+    def totals(self) -> Dict:
+        with self._lock:
+            keys = ("calls", "cached_calls", "input_tokens", "output_tokens", "total_tokens", "cost")
+            return {key: sum(usage[key] for usage in self.sections.values()) for key in keys}
+
+    def exceeded(self) -> bool:
+        totals = self.totals()
+        return ((self.max_tokens is not None and totals["total_tokens"] >= self.max_tokens) or
+                (self.max_cost is not None and totals["cost"] >= self.max_cost))
+
+    def check(self) -> Optional[str]:
+        # None se si può procedere, il modello da usare se il budget impone il downgrade
+        if not self.exceeded():
+            return None
+        if self.on_exceeded == "downgrade" and self.downgrade_model:
+            return self.downgrade_model
+        raise BudgetExceededError(
+            f"Usage budget exceeded (max_tokens={self.max_tokens}, max_cost={self.max_cost}): {self.totals()}"
+        )
+
+    def report(self) -> Dict:
+        with self._lock:
+            sections = {name: dict(usage, models=list(usage["models"])) for name, usage in self.sections.items()}
+        return {
+            "sections": sections,
+            "total": self.totals(),
+            "budget": {"max_tokens": self.max_tokens, "max_cost": self.max_cost, "on_exceeded": self.on_exceeded},
+            "exceeded": self.exceeded(),
+        }
+
+
+def current_tracker() -> Optional[UsageTracker]:
+    return _current_tracker.get()
+
+
+def current_section() -> Optional[str]:
+    return _current_section.get()
+
+
+@contextmanager
+def track_usage(tracker: Optional[UsageTracker] = None, **budget):
+    # Tutte le chiamate LLM fatte nel blocco (anche da thread avviati con il contesto copiato)
+    # vengono accumulate nel tracker
+    tracker = tracker or UsageTracker(**budget)
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+
+
+@contextmanager
+def section_scope(section: str):
+    token = _current_section.set(section)
+    try:
+        yield
+    finally:
+        _current_section.reset(token)
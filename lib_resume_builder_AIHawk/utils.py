@@ -1,11 +1,17 @@
+import base64
+import io
 import platform
 import os
 import time
+from contextlib import contextmanager
 from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium import webdriver
 import time
 from webdriver_manager.chrome import ChromeDriverManager
+from lib_resume_builder_AIHawk.config import global_config
+from lib_resume_builder_AIHawk.disk_cache import DiskCache
+from lib_resume_builder_AIHawk.render_barrier import wait_until_ready
 
 def create_driver_selenium():
     options = get_chrome_browser_options()  # Use the method to get Chrome options
@@ -19,37 +25,183 @@ def create_driver_selenium():
     service = ChromeService(executable_path=chromedriver_path)
     return webdriver.Chrome(service=service, options=options)
 
-def HTML_to_PDF(FilePath):
-    # Validazione e preparazione del percorso del file
-    if not os.path.isfile(FilePath):
-        raise FileNotFoundError(f"The specified file does not exist: {FilePath}")
-    FilePath = f"file:///{os.path.abspath(FilePath).replace(os.sep, '/')}"
+@contextmanager
+def _driver_session(pool=None):
+    # Con un pool si riusa un browser già avviato, altrimenti se ne lancia uno dedicato
+    if pool is not None:
+        with pool.page() as driver:
+            yield driver
+        return
     driver = create_driver_selenium()
-
     try:
-        driver.get(FilePath)
-        time.sleep(2)
-        pdf_base64 = driver.execute_cdp_cmd("Page.printToPDF", {
-            "printBackground": True,         # Include lo sfondo nella stampa
-            "landscape": False,              # Stampa in verticale (False per ritratto)
-            "paperWidth": 8.27,              # Larghezza del foglio in pollici (A4)
-            "paperHeight": 11.69,            # Altezza del foglio in pollici (A4)
-            "marginTop": 0.8,                # Margine superiore in pollici (circa 2 cm)
-            "marginBottom": 0.8,             # Margine inferiore in pollici (circa 2 cm)
-            "marginLeft": 0.5,               # Margine sinistro in pollici (circa 2 cm)
-            "marginRight": 0.5,              # Margine destro in pollici (circa 2 cm)
-            "displayHeaderFooter": False,   # Non visualizzare intestazioni e piè di pagina
-            "preferCSSPageSize": True,       # Preferire le dimensioni della pagina CSS
-            "generateDocumentOutline": False, # Non generare un sommario del documento
-            "generateTaggedPDF": False,      # Non generare PDF taggato
-            "transferMode": "ReturnAsBase64" # Restituire il PDF come stringa base64
-        })
-        return pdf_base64['data']
-    except WebDriverException as e:
-        raise RuntimeError(f"WebDriver exception occurred: {e}")
+        yield driver
     finally:
         driver.quit()
 
+PDF_PRINT_OPTIONS = {
+    "printBackground": True,         # Include lo sfondo nella stampa
+    "landscape": False,              # Stampa in verticale (False per ritratto)
+    "paperWidth": 8.27,              # Larghezza del foglio in pollici (A4)
+    "paperHeight": 11.69,            # Altezza del foglio in pollici (A4)
+    "marginTop": 0.8,                # Margine superiore in pollici (circa 2 cm)
+    "marginBottom": 0.8,             # Margine inferiore in pollici (circa 2 cm)
+    "marginLeft": 0.5,               # Margine sinistro in pollici (circa 2 cm)
+    "marginRight": 0.5,              # Margine destro in pollici (circa 2 cm)
+    "displayHeaderFooter": False,   # Non visualizzare intestazioni e piè di pagina
+    "preferCSSPageSize": True,       # Preferire le dimensioni della pagina CSS
+    "generateDocumentOutline": False, # Non generare un sommario del documento
+    "generateTaggedPDF": False,      # Non generare PDF taggato
+}
+
+def _set_html(driver, html):
+    # Carica l'HTML direttamente nella pagina, senza passare da un file su disco
+    if isinstance(html, (bytes, bytearray, memoryview)):
+        html = bytes(html).decode('utf-8')
+    driver.get("about:blank")
+    frame_id = driver.execute_cdp_cmd("Page.getFrameTree", {})["frameTree"]["frame"]["id"]
+    driver.execute_cdp_cmd("Page.setDocumentContent", {"frameId": frame_id, "html": html})
+
+def _wait_for_render(driver):
+    wait_until_ready(
+        driver,
+        timeout=global_config.RENDER_READY_TIMEOUT,
+        selector=global_config.RENDER_READY_SELECTOR,
+        network_idle_ms=global_config.RENDER_NETWORK_IDLE_MS,
+    )
+
+def _load_html(driver, html):
+    _set_html(driver, html)
+    _wait_for_render(driver)
+
+def HTML_string_to_PDF(html, pool=None, cache=None, cache_key_parts=()):
+    pdf_bytes = HTML_string_to_PDF_bytes(html, pool=pool, cache=cache, cache_key_parts=cache_key_parts)
+    return base64.b64encode(pdf_bytes).decode('ascii')
+
+def _stream_pdf(driver, destination):
+    # Il PDF viene letto a blocchi con IO.read e scritto subito, senza tenerlo tutto in memoria
+    result = driver.execute_cdp_cmd("Page.printToPDF", {
+        **PDF_PRINT_OPTIONS,
+        "transferMode": "ReturnAsStream" # Restituire un handle da leggere con IO.read
+    })
+    handle = result["stream"]
+    written = 0
+    try:
+        while True:
+            chunk = driver.execute_cdp_cmd("IO.read", {"handle": handle, "size": global_config.PDF_STREAM_CHUNK_SIZE})
+            if chunk.get("base64Encoded"):
+                data = base64.b64decode(chunk["data"])
+            else:
+                data = chunk["data"].encode("utf-8")
+            destination.write(data)
+            written += len(data)
+            if chunk.get("eof"):
+                break
+    finally:
+        driver.execute_cdp_cmd("IO.close", {"handle": handle})
+    return written
+
+def _render_PDF_stream(html, destination, pool=None):
+    # L'errore si converte fuori dalla sessione: il pool deve vedere la WebDriverException
+    # per scartare il browser invece di riconsegnarlo
+    try:
+        with _driver_session(pool) as driver:
+            _load_html(driver, html)
+            return _stream_pdf(driver, destination)
+    except WebDriverException as e:
+        raise RuntimeError(f"WebDriver exception occurred: {e}") from e
+
+def PDF_cache_key(html, cache_key_parts=()):
+    # La chiave copre l'HTML finale, le opzioni di stampa e gli eventuali contenuti aggiuntivi (es. il CSS)
+    return DiskCache.make_key(html, PDF_PRINT_OPTIONS, *cache_key_parts)
+
+def HTML_string_to_PDF_file(html, destination, pool=None, cache=None, cache_key_parts=()):
+    # destination può essere un percorso o un buffer binario scrivibile
+    if isinstance(destination, (str, os.PathLike)):
+        try:
+            with open(destination, 'wb') as pdf_file:
+                return HTML_string_to_PDF_file(html, pdf_file, pool=pool, cache=cache, cache_key_parts=cache_key_parts)
+        except BaseException:
+            if os.path.exists(destination):
+                os.remove(destination)
+            raise
+    if cache is None:
+        return _render_PDF_stream(html, destination, pool=pool)
+    key = PDF_cache_key(html, cache_key_parts)
+    cached_path = cache.get_path(key)
+    if cached_path is not None:
+        try:
+            with open(cached_path, 'rb') as cached_file:
+                return _copy_stream(cached_file, destination)
+        except FileNotFoundError:
+            # Eliminato da un'eviction concorrente dopo get_path: si comporta come un miss
+            pass
+    # Cache miss: Chrome scrive direttamente nel file temporaneo della cache
+    cached_path = cache.put_stream(key, lambda cache_file: _render_PDF_stream(html, cache_file, pool=pool))
+    try:
+        with open(cached_path, 'rb') as cached_file:
+            return _copy_stream(cached_file, destination)
+    except FileNotFoundError:
+        # Anche la voce appena scritta può sparire per l'eviction di un altro put
+        return _render_PDF_stream(html, destination, pool=pool)
+
+def _copy_stream(source, destination):
+    written = 0
+    while True:
+        data = source.read(global_config.PDF_STREAM_CHUNK_SIZE)
+        if not data:
+            return written
+        destination.write(data)
+        written += len(data)
+
+def HTML_string_to_PDF_bytes(html, pool=None, cache=None, cache_key_parts=()):
+    buffer = io.BytesIO()
+    HTML_string_to_PDF_file(html, buffer, pool=pool, cache=cache, cache_key_parts=cache_key_parts)
+    return buffer.getvalue()
+
+def HTML_strings_to_PDF_bytes(htmls, pool=None, cache=None, cache_key_parts=None):
+    # Renderizza più documenti in un solo browser: ogni documento ha la sua scheda, così
+    # il caricamento di font e layout procede in parallelo prima delle stampe
+    cache_key_parts = cache_key_parts or {}
+    results = {}
+    pending = {}
+    for name, html in htmls.items():
+        key = PDF_cache_key(html, cache_key_parts.get(name, ())) if cache is not None else None
+        cached_pdf = cache.get_bytes(key) if key is not None else None
+        if cached_pdf is not None:
+            results[name] = cached_pdf
+        else:
+            pending[name] = (html, key)
+    if not pending:
+        return results
+
+    try:
+        with _driver_session(pool) as driver:
+            handles = {}
+            for index, (name, (html, _)) in enumerate(pending.items()):
+                if index > 0:
+                    driver.switch_to.new_window('tab')
+                _set_html(driver, html)
+                handles[name] = driver.current_window_handle
+            for name, (html, key) in pending.items():
+                driver.switch_to.window(handles[name])
+                _wait_for_render(driver)
+                buffer = io.BytesIO()
+                _stream_pdf(driver, buffer)
+                results[name] = buffer.getvalue()
+                if key is not None:
+                    cache.put_bytes(key, results[name])
+    except WebDriverException as e:
+        raise RuntimeError(f"WebDriver exception occurred: {e}") from e
+    return {name: results[name] for name in htmls}
+
+def HTML_to_PDF(FilePath, pool=None):
+    # Validazione del percorso del file, il contenuto viene poi renderizzato in memoria
+    if not os.path.isfile(FilePath):
+        raise FileNotFoundError(f"The specified file does not exist: {FilePath}")
+    with open(FilePath, 'r', encoding='utf-8') as html_file:
+        html = html_file.read()
+    return HTML_string_to_PDF(html, pool=pool)
+
 def get_chrome_browser_options():
     options = webdriver.ChromeOptions()
     options.add_argument("--start-maximized")  # Avvia il browser a schermo intero